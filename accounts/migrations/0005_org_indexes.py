@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0004_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='account',
+            index=models.Index(fields=['org', 'status', 'created_at', 'id'], name='account_org_status_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='account',
+            index=models.Index(models.F('org'), django.db.models.functions.text.Upper('name'), name='account_org_upper_name'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+import common.base
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Only the Python-side default changes: existing rows keep their
+    # uuid4 keys and no table is rewritten.
+
+    dependencies = [
+        ('accounts', '0005_org_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='account',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='accountemail',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='accountemaillog',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='tags',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
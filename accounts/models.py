@@ -1,22 +1,58 @@
 import arrow
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.utils.translation import pgettext_lazy
 from phonenumber_field.modelfields import PhoneNumberField
 
 from common import utils
+from common.indexes import trigram_index
 from common.models import Org, Profile
 from common.utils import COUNTRIES, INDCHOICES
 from contacts.models import Contact
 from teams.models import Teams
 from common.base import BaseModel
+from common.manager import BaseManager
+
+
+class TagsManager(BaseManager):
+    def resolve_ids(self, names):
+        """
+        Return the ids of the tags named ``names``, creating the missing ones.
+
+        Names are matched on their slug, duplicates collapse to one tag and the
+        ids come back in first-seen order. Existing tags are read with one
+        SELECT and the missing ones written with a single
+        ``INSERT ... ON CONFLICT DO NOTHING``; only the slugs that were
+        missing are read back, to pick up rows a concurrent request won.
+        """
+        names_by_slug = {}
+        for name in names:
+            slug = slugify(name)
+            if slug:
+                names_by_slug.setdefault(slug, name)
+        if not names_by_slug:
+            return []
+        ids = dict(self.filter(slug__in=names_by_slug).values_list("slug", "id"))
+        missing = [slug for slug in names_by_slug if slug not in ids]
+        if missing:
+            self.bulk_create(
+                [self.model(name=names_by_slug[slug], slug=slug) for slug in missing],
+                ignore_conflicts=True,
+            )
+            ids.update(self.filter(slug__in=missing).values_list("slug", "id"))
+        return [ids[slug] for slug in names_by_slug if slug in ids]
 
 
 class Tags(BaseModel):
     name = models.CharField(max_length=20)
     slug = models.CharField(max_length=20, unique=True, blank=True)
 
+    objects = TagsManager()
 
     class Meta:
         verbose_name = "Tag"
@@ -84,12 +120,24 @@ class Account(BaseModel):
         blank=True,
         related_name="account_org",
     )
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Account"
         verbose_name_plural = "Accounts"
         db_table = "accounts"
         ordering = ("-created_at",)
+        indexes = [
+            GinIndex(fields=["search_vector"], name="account_search_vector"),
+            trigram_index("name", "account_name_trgm"),
+            trigram_index("billing_city", "account_billing_city_trgm"),
+            trigram_index("industry", "account_industry_trgm"),
+            models.Index(
+                fields=["org", "status", "created_at", "id"],
+                name="account_org_status_created",
+            ),
+            models.Index(F("org"), Upper("name"), name="account_org_upper_name"),
+        ]
 
     def __str__(self):
         return f"{self.name}"
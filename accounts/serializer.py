@@ -3,21 +3,25 @@ from rest_framework import serializers
 from accounts.models import Account, AccountEmail, Tags, AccountEmailLog
 from common.serializer import (
     AttachmentsSerializer,
+    EagerLoadingListSerializer,
+    EagerLoadingMixin,
     OrganizationSerializer,
     ProfileSerializer,
-    UserSerializer
+    UserSerializer,
+    ValuesSummarySerializer,
 )
 from contacts.serializer import ContactSerializer
 from teams.serializer import TeamsSerializer
 
 
-class TagsSerailizer(serializers.ModelSerializer):
+class TagsSerailizer(EagerLoadingMixin, serializers.ModelSerializer):
     class Meta:
         model = Tags
         fields = ("id", "name", "slug")
+        list_serializer_class = EagerLoadingListSerializer
 
 
-class AccountSerializer(serializers.ModelSerializer):
+class AccountSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     created_by = UserSerializer()
     org = OrganizationSerializer()
     tags = TagsSerailizer(read_only=True, many=True)
@@ -26,8 +30,17 @@ class AccountSerializer(serializers.ModelSerializer):
     teams = TeamsSerializer(read_only=True, many=True)
     account_attachment = AttachmentsSerializer(read_only=True, many=True)
 
+    select_related_fields = ("created_by", "org")
+    prefetch_related_fields = ("tags", "account_attachment")
+    nested_serializers = {
+        "assigned_to": ProfileSerializer,
+        "contacts": ContactSerializer,
+        "teams": TeamsSerializer,
+    }
+
     class Meta:
         model = Account
+        list_serializer_class = EagerLoadingListSerializer
         # fields = ‘__all__’
         fields = (
             "id",
@@ -57,6 +70,36 @@ class AccountSerializer(serializers.ModelSerializer):
         )
 
 
+class AccountSummarySerializer(ValuesSummarySerializer):
+    model = Account
+    fields = (
+        "name",
+        "email",
+        "phone",
+        "industry",
+        "billing_address_line",
+        "billing_street",
+        "billing_city",
+        "billing_state",
+        "billing_postcode",
+        "billing_country",
+        "website",
+        "description",
+        "created_by",
+        "created_at",
+        "is_active",
+        "status",
+        "contact_name",
+    )
+    default_fields = ("name", "email", "phone", "industry", "status", "created_at")
+    expandable_fields = {
+        "tags": TagsSerailizer,
+        "contacts": ContactSerializer,
+        "assigned_to": ProfileSerializer,
+        "teams": TeamsSerializer,
+    }
+
+
 class EmailSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
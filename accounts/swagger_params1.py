@@ -14,6 +14,18 @@ account_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("open_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("close_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("expand", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("include_choices", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
 
-
+export_params = [
+    organization_params_in_header,
+    OpenApiParameter(
+        "output", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["csv", "ndjson"]
+    ),
+]
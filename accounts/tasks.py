@@ -13,49 +13,67 @@ from common.utils import convert_to_custom_timezone
 
 app = Celery("redis://")
 
+# Sent mails are logged this many at a time; a retry skips the logged
+# contacts, so at most this many are mailed twice after a crash.
+EMAIL_LOG_BATCH_SIZE = 100
+
+
+def save_email_logs(email_obj, logs):
+    # One UPDATE and one multi-row INSERT per batch. The worker has no
+    # request user, so both are stamped with the sender's (save() would
+    # clear created_by instead).
+    author = email_obj.created_by
+    AccountEmail.objects.bulk_update([email_obj], ["rendered_message_body"], user=author)
+    AccountEmailLog.objects.bulk_create(logs, user=author)
+
 
 @app.task
 def send_email(email_obj_id):
-    email_obj = Email.objects.filter(id=email_obj_id).first()
+    email_obj = AccountEmail.objects.filter(id=email_obj_id).first()
     if email_obj:
         from_email = email_obj.from_email
-        contacts = email_obj.recipients.all()
+        sent_contact_ids = AccountEmailLog.objects.filter(
+            email=email_obj, is_sent=True
+        ).values_list("contact_id", flat=True)
+        contacts = email_obj.recipients.exclude(id__in=sent_contact_ids)
+        logs = []
         for contact_obj in contacts:
-            if not EmailLog.objects.filter(
-                email=email_obj, contact=contact_obj, is_sent=True
-            ).exists():
-                html = email_obj.message_body
-                context_data = {
-                    "email": contact_obj.primary_email
-                    if contact_obj.primary_email
-                    else "",
-                    "name": contact_obj.first_name
-                    if contact_obj.first_name
-                    else "" + " " + contact_obj.last_name
-                    if contact_obj.last_name
-                    else "",
-                }
-                try:
-                    html_content = Template(html).render(Context(context_data))
-                    subject = email_obj.message_subject
-                    msg = EmailMessage(
-                        subject,
-                        html_content,
-                        from_email=from_email,
-                        to=[
-                            contact_obj.primary_email,
-                        ],
+            html = email_obj.message_body
+            context_data = {
+                "email": contact_obj.primary_email
+                if contact_obj.primary_email
+                else "",
+                "name": contact_obj.first_name
+                if contact_obj.first_name
+                else "" + " " + contact_obj.last_name
+                if contact_obj.last_name
+                else "",
+            }
+            try:
+                html_content = Template(html).render(Context(context_data))
+                subject = email_obj.message_subject
+                msg = EmailMessage(
+                    subject,
+                    html_content,
+                    from_email=from_email,
+                    to=[
+                        contact_obj.primary_email,
+                    ],
+                )
+                msg.content_subtype = "html"
+                res = msg.send()
+                if res:
+                    email_obj.rendered_message_body = html_content
+                    logs.append(
+                        AccountEmailLog(email=email_obj, contact=contact_obj, is_sent=True)
                     )
-                    msg.content_subtype = "html"
-                    res = msg.send()
-                    if res:
-                        email_obj.rendered_message_body = html_content
-                        email_obj.save()
-                        EmailLog.objects.create(
-                            email=email_obj, contact=contact_obj, is_sent=True
-                        )
-                except Exception as e:
-                    print(e)
+                    if len(logs) >= EMAIL_LOG_BATCH_SIZE:
+                        save_email_logs(email_obj, logs)
+                        logs = []
+            except Exception as e:
+                print(e)
+        if logs:
+            save_email_logs(email_obj, logs)
 
 
 @app.task
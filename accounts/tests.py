@@ -0,0 +1,280 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from crum import impersonate
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account, Tags
+from accounts.serializer import AccountSerializer
+from common.assignment import bulk_assign, filter_assigned, send_assignment_digests
+from common.counters import COUNTERS_BY_MODEL, get_counters
+from common.export import ACCOUNT_EXPORT, stream_export
+from common.models import Attachments, DashboardCounter, Org, Profile, User
+from common.visibility import filter_visible
+from contacts.models import Contact
+from teams.models import Teams
+
+
+class AccountSerializerQueriesTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(email="user%d@example.com" % i), org=self.org
+            )
+            for i in range(2)
+        ]
+        self.team = Teams.objects.create(name="team", description="team", org=self.org)
+        self.team.users.add(*self.profiles)
+        self.tag = Tags.objects.create(name="tag")
+
+    def create_accounts(self, count):
+        for i in range(Account.objects.count(), count):
+            account = Account.objects.create(
+                name="account%d" % i,
+                email="account%d@example.com" % i,
+                contact_name="contact",
+                org=self.org,
+            )
+            contact = Contact.objects.create(
+                first_name="contact%d" % i,
+                last_name="last",
+                primary_email="contact%d@example.com" % i,
+                org=self.org,
+            )
+            contact.teams.add(self.team)
+            contact.assigned_to.add(*self.profiles)
+            Attachments.objects.create(file_name="file", account=account)
+            Attachments.objects.create(file_name="file", contact=contact)
+            account.tags.add(self.tag)
+            account.contacts.add(contact)
+            account.teams.add(self.team)
+            account.assigned_to.add(*self.profiles)
+
+    def test_list_query_count(self):
+        # accounts (+created_by, org), tags, account_attachment,
+        # assigned_to (+user), contacts (+org, address), contact_attachment,
+        # contact teams (+created_by), their users (+user), contact assigned_to
+        # (+user), teams (+created_by) and their users (+user).
+        for count in (1, 5):
+            self.create_accounts(count)
+            with self.assertNumQueries(11):
+                data = AccountSerializer(
+                    Account.objects.filter(org=self.org), many=True
+                ).data
+            self.assertEqual(len(data), count)
+
+
+class DashboardCounterTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.creator, self.member = [
+            Profile.objects.create(
+                user=User.objects.create(email="user%d@example.com" % i), org=self.org
+            )
+            for i in range(2)
+        ]
+        self.spec = COUNTERS_BY_MODEL[Account]
+
+    def counts(self):
+        return (
+            get_counters(self.creator, admin=True)["accounts"],
+            get_counters(self.creator, admin=False)["accounts"],
+            get_counters(self.member, admin=False)["accounts"],
+        )
+
+    def assertCounts(self, expected):
+        self.assertEqual(self.counts(), expected)
+        # The incrementally maintained rows agree with a recount.
+        self.assertEqual(
+            (
+                self.spec.queryset(self.org.id).count(),
+                self.spec.queryset(self.org.id, self.creator.id).count(),
+                self.spec.queryset(self.org.id, self.member.id).count(),
+            ),
+            expected,
+        )
+
+    def test_counters_follow_writes(self):
+        self.assertCounts((0, 0, 0))
+        with impersonate(self.creator.user):
+            account = Account.objects.create(
+                name="account", email="a@example.com", contact_name="c", org=self.org
+            )
+        self.assertCounts((1, 1, 0))
+        account.assigned_to.add(self.creator, self.member)
+        self.assertCounts((1, 1, 1))
+        with impersonate(self.creator.user):
+            account.status = "close"
+            account.save()
+        self.assertCounts((0, 0, 0))
+        with impersonate(self.creator.user):
+            account.status = "open"
+            account.save()
+        self.assertCounts((1, 1, 1))
+        self.member.account_assigned_users.remove(account)
+        self.assertCounts((1, 1, 0))
+        account.assigned_to.clear()
+        self.assertCounts((1, 1, 0))
+        account.delete()
+        self.assertCounts((0, 0, 0))
+        self.assertEqual(
+            DashboardCounter.objects.filter(org=self.org, profile=None).count(), 2
+        )
+
+
+    def test_saves_leaving_counted_fields_skip_the_counters(self):
+        with impersonate(self.creator.user):
+            account = Account.objects.create(
+                name="account", email="a@example.com", contact_name="c", org=self.org
+            )
+        self.assertCounts((1, 1, 0))
+        account = Account.objects.get(pk=account.pk)
+        with impersonate(self.creator.user), CaptureQueriesContext(connection) as queries:
+            account.name = "renamed"
+            account.save()
+            account.save(update_fields=["name"])
+        self.assertFalse(
+            [query for query in queries if "dashboard_counter" in query["sql"]]
+        )
+        self.assertCounts((1, 1, 0))
+
+
+class BulkAuditTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.profile = Profile.objects.create(
+            user=User.objects.create(email="user@example.com"), org=self.org
+        )
+        self.user = self.profile.user
+
+    def build(self, count):
+        return [
+            Account(name="account%d" % i, email="a@example.com", contact_name="c", org=self.org)
+            for i in range(count)
+        ]
+
+    def test_bulk_create_stamps_the_current_user(self):
+        with impersonate(self.user):
+            Account.objects.bulk_create(self.build(3))
+        self.assertEqual(
+            set(Account.objects.values_list("created_by", "updated_by")),
+            {(self.user.id, self.user.id)},
+        )
+
+    def test_bulk_create_without_request_takes_user(self):
+        Account.objects.bulk_create(self.build(2), user=self.user)
+        self.assertEqual(filter_visible(Account.objects.all(), self.profile).count(), 2)
+        self.assertEqual(get_counters(self.profile, admin=True)["accounts"], 2)
+        self.assertEqual(get_counters(self.profile, admin=False)["accounts"], 2)
+
+    def test_bulk_update_stamps_updated_by(self):
+        accounts = Account.objects.bulk_create(self.build(2))
+        before = Account.objects.values_list("updated_at", flat=True).first()
+        for account in accounts:
+            account.status = "close"
+        Account.objects.bulk_update(accounts, ["status"], user=self.user)
+        self.assertEqual(
+            set(Account.objects.values_list("status", "updated_by")),
+            {("close", self.user.id)},
+        )
+        self.assertGreater(Account.objects.values_list("updated_at", flat=True).first(), before)
+        self.assertEqual(get_counters(self.profile, admin=True)["accounts"], 0)
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.profile = Profile.objects.create(
+            user=User.objects.create(email="user@example.com"), org=self.org
+        )
+        tags = [Tags.objects.create(name="red"), Tags.objects.create(name="blue")]
+        for i in range(5):
+            account = Account.objects.create(
+                name="account%d" % i, email="a@example.com", contact_name="c", org=self.org
+            )
+            account.tags.add(*tags)
+            account.assigned_to.add(self.profile)
+
+    def content(self, output):
+        response = stream_export(
+            ACCOUNT_EXPORT, Account.objects.filter(org=self.org), output
+        )
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_csv_flattens_many_to_many_columns(self):
+        rows = list(csv.DictReader(io.StringIO(self.content("csv"))))
+        self.assertEqual([row["name"] for row in rows], ["account%d" % i for i in range(5)])
+        self.assertEqual({row["tags"] for row in rows}, {"blue; red"})
+        self.assertEqual({row["assigned_to"] for row in rows}, {"user@example.com"})
+        self.assertEqual({row["contacts"] for row in rows}, {""})
+
+    def test_csv_neutralizes_formulas(self):
+        Account.objects.filter(name="account0").update(
+            name="=HYPERLINK(\"http://evil\")", description="@SUM(A1)"
+        )
+        rows = list(csv.DictReader(io.StringIO(self.content("csv"))))
+        self.assertEqual(rows[0]["name"], "'=HYPERLINK(\"http://evil\")")
+        self.assertEqual(rows[0]["description"], "'@SUM(A1)")
+        self.assertEqual(rows[1]["name"], "account1")
+        # NDJSON is data, not a spreadsheet: values are left as they are.
+        self.assertEqual(json.loads(self.content("ndjson").splitlines()[0])["description"], "@SUM(A1)")
+
+    def test_ndjson_streams_in_chunks(self):
+        rows = list(ACCOUNT_EXPORT.rows(Account.objects.filter(org=self.org), chunk_size=2))
+        self.assertEqual(len(rows), 5)
+        lines = self.content("ndjson").splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])["tags"], "blue; red")
+
+
+class BulkAssignTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.leaving, self.staying, self.new = [
+            Profile.objects.create(
+                user=User.objects.create(email="user%d@example.com" % i), org=self.org
+            )
+            for i in range(3)
+        ]
+        self.accounts = Account.objects.bulk_create(
+            [
+                Account(name="account%d" % i, email="a@example.com", contact_name="c", org=self.org)
+                for i in range(4)
+            ]
+        )
+        for account in self.accounts[:3]:
+            account.assigned_to.add(self.leaving)
+        self.accounts[0].assigned_to.add(self.new)
+
+    def test_reassigns_a_book_set_wise(self):
+        queryset = filter_assigned(Account.objects.filter(org=self.org), self.leaving.id)
+        object_ids, added, removed = bulk_assign(queryset, [self.new.id], [self.leaving.id])
+        self.assertEqual(len(object_ids), 3)
+        self.assertEqual(
+            sorted(added[self.new.id]), sorted(account.id for account in self.accounts[1:3])
+        )
+        self.assertEqual(len(removed[self.leaving.id]), 3)
+        self.assertNotIn(self.staying.id, added)
+        self.assertFalse(filter_assigned(Account.objects.all(), self.leaving.id).exists())
+        self.assertEqual(filter_assigned(Account.objects.all(), self.new.id).count(), 3)
+        self.assertEqual(filter_visible(Account.objects.all(), self.leaving).count(), 0)
+        self.assertEqual(get_counters(self.new, admin=False)["accounts"], 3)
+
+    def test_digests_carry_only_the_listed_ids(self):
+        queryset = filter_assigned(Account.objects.filter(org=self.org), self.leaving.id)
+        _, added, removed = bulk_assign(queryset, [], [self.leaving.id])
+        with mock.patch("common.assignment.ASSIGNMENT_DIGEST_LIMIT", 2), mock.patch(
+            "common.assignment.send_assignment_digest.delay"
+        ) as delay:
+            send_assignment_digests(Account, added, removed)
+        (profile_id, label, added_ids, added_count, removed_ids, removed_count, _), _ = (
+            delay.call_args
+        )
+        self.assertEqual((profile_id, label), (str(self.leaving.id), "accounts.Account"))
+        self.assertEqual((added_ids, added_count), ([], 0))
+        self.assertEqual((len(removed_ids), removed_count), (2, 3))
@@ -6,6 +6,8 @@ app_name = "api_accounts"
 
 urlpatterns = [
     path('list/', views.AccountsListView.as_view(), name='list'),
+    path("export/", views.AccountsExportView.as_view(), name="export"),
+    path("assign/", views.AccountsBulkAssignView.as_view(), name="assign"),
     path("<str:pk>/", views.AccountDetailView.as_view()),
     path("<str:pk>/create_mail/", views.AccountCreateMailView.as_view()),
     path("comment/<str:pk>/", views.AccountCommentView.as_view()),
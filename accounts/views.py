@@ -7,7 +7,6 @@ from drf_rw_serializers import generics
 
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -18,6 +17,7 @@ from accounts.models import Account, Tags
 from accounts.serializer import (
     AccountCreateSerializer,
     AccountSerializer,
+    AccountSummarySerializer,
     EmailSerializer,
     TagsSerailizer,
     AccountReadSerializer,
@@ -28,12 +28,20 @@ from accounts.serializer import (
 )
 from teams.serializer import TeamsSerializer
 from accounts.tasks import send_email, send_email_to_assigned_user
+from common.assignment import BulkAssignView
+from common.choices import wants_choices
+from common.conditional import conditional_get
+from common.export import ACCOUNT_EXPORT, export_output, stream_export
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.pagination import KeysetPagination
+from common.response_cache import cache_response
 
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import (
     AttachmentsSerializer,
+    BulkAssignSerializer,
     CommentSerializer,
     ProfileSerializer,
 )
@@ -45,13 +53,14 @@ from common.utils import (
     PRIORITY_CHOICE,
     STATUS_CHOICE,
 )
+from common.visibility import filter_visible
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
 from invoices.serializer import InvoiceSerializer
 from teams.models import Teams
 
 
-class AccountsListView(APIView, LimitOffsetPagination):
+class AccountsListView(APIView, KeysetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Account
@@ -59,17 +68,15 @@ class AccountsListView(APIView, LimitOffsetPagination):
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
-            queryset = queryset.filter(
-                Q(created_by=self.request.profile.user) | Q(assigned_to=self.request.profile)
-            ).distinct()
+            queryset = filter_visible(queryset, self.request.profile)
 
         if params:
             if params.get("name"):
                 queryset = queryset.filter(name__icontains=params.get("name"))
             if params.get("city"):
-                queryset = queryset.filter(billing_city__contains=params.get("city"))
+                queryset = queryset.filter(billing_city__icontains=params.get("city"))
             if params.get("industry"):
                 queryset = queryset.filter(industry__icontains=params.get("industry"))
             if params.get("tags"):
@@ -78,70 +85,60 @@ class AccountsListView(APIView, LimitOffsetPagination):
                 ).distinct()
 
         context = {}
+        summary = AccountSummarySerializer.from_request(self.request)
+        if summary:
+            queryset = summary.get_queryset(queryset)
         queryset_open = queryset.filter(status="open")
         results_accounts_open = self.paginate_queryset(
-            queryset_open.distinct(), self.request, view=self
+            queryset_open, self.request, view=self, cursor_query_param="open_cursor"
         )
-        if results_accounts_open:
-            offset = queryset_open.filter(id__gte=results_accounts_open[-1].id).count()
-            if offset == queryset_open.count():
-                offset = None
+        if summary:
+            accounts_open = summary.to_representation(results_accounts_open)
         else:
-            offset = 0
-        accounts_open = AccountSerializer(results_accounts_open, many=True).data
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
+            accounts_open = AccountSerializer(results_accounts_open, many=True).data
+        context["per_page"] = self.limit
         context["active_accounts"] = {
-            "offset": offset,
+            "open_accounts_count": self.count,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
             "open_accounts": accounts_open,
         }
 
         queryset_close = queryset.filter(status="close")
         results_accounts_close = self.paginate_queryset(
-            queryset_close.distinct(), self.request, view=self
+            queryset_close, self.request, view=self, cursor_query_param="close_cursor"
         )
-        if results_accounts_close:
-            offset = queryset_close.filter(
-                id__gte=results_accounts_close[-1].id
-            ).count()
-            if offset == queryset_close.count():
-                offset = None
+        if summary:
+            accounts_close = summary.to_representation(results_accounts_close)
         else:
-            offset = 0
-        accounts_close = AccountSerializer(results_accounts_close, many=True).data
-
-        contacts = Contact.objects.filter(org=self.request.profile.org).values(
-            "id", "first_name"
-        )
-        context["contacts"] = contacts
+            accounts_close = AccountSerializer(results_accounts_close, many=True).data
         context["closed_accounts"] = {
-            "offset": offset,
+            "close_accounts_count": self.count,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
             "close_accounts": accounts_close,
         }
-        context["teams"] = TeamsSerializer(
-            Teams.objects.filter(org=self.request.profile.org), many=True
-        ).data
-        context["countries"] = COUNTRIES
-        context["industries"] = INDCHOICES
-
-        tags = Tags.objects.all()
-        tags = TagsSerailizer(tags, many=True).data
-
-        context["tags"] = tags
-        users = Profile.objects.filter(is_active=True, org=self.request.profile.org).values(
-            "id", "user__email"
-        )
-        context["users"] = users
-        leads = Lead.objects.filter(org=self.request.profile.org).exclude(
-            Q(status="converted") | Q(status="closed")
-        )
-        context["users"] = users
-        context["leads"] = LeadSerializer(leads, many=True).data
+
+        # Contacts, teams, tags and users for the pickers are served by the
+        # cached /api/lookups/<name>/ endpoints.
+        if wants_choices(self.request):
+            context["countries"] = COUNTRIES
+            context["industries"] = INDCHOICES
         context["status"] = ["open","close"]
         return context
 
     @extend_schema(tags=["Accounts"], parameters=swagger_params1.account_get_params)
+    @conditional_get
+    @cache_response(
+        "accounts.Account",
+        "accounts.Tags",
+        "contacts.Contact",
+        "teams.Teams",
+        "common.Profile",
+        "common.Address",
+        "common.Attachments",
+        "common.Org",
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -164,13 +161,9 @@ class AccountsListView(APIView, LimitOffsetPagination):
                     account_object.contacts.add(*contacts)
             if data.get("tags"):
                 tags = json.loads(data.get("tags"))
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(slug=tag.lower())
-                    if tag_obj.exists():
-                        tag_obj = tag_obj[0]
-                    else:
-                        tag_obj = Tags.objects.create(name=tag)
-                    account_object.tags.add(tag_obj)
+                tag_ids = Tags.objects.resolve_ids(tags)
+                if tag_ids:
+                    account_object.tags.add(*tag_ids)
             if data.get("teams"):
                 teams_list = json.loads(data.get("teams"))
                 teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
@@ -213,6 +206,17 @@ class AccountDetailView(APIView):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     serializer_class = AccountReadSerializer
+    # The detail GET is not response-cached; these feed conditional_get's ETag.
+    validator_labels = (
+        "accounts.Account",
+        "accounts.Tags",
+        "contacts.Contact",
+        "teams.Teams",
+        "common.Profile",
+        "common.Attachments",
+        "common.Comment",
+        "invoices.Invoice",
+    )
 
     def get_object(self, pk):
         return get_object_or_404(Account, id=pk)
@@ -247,43 +251,36 @@ class AccountDetailView(APIView):
                         status=status.HTTP_403_FORBIDDEN,
                     )
             account_object = serializer.save()
-            previous_assigned_to_users = list(
-                account_object.assigned_to.all().values_list("id", flat=True)
-            )
 
-            account_object.contacts.clear()
+            contact_ids = []
             if data.get("contacts"):
                 contacts_list = json.loads(data.get("contacts"))
-                contacts = Contact.objects.filter(id__in=contacts_list, org=request.profile.org)
-                if contacts:
-                    account_object.contacts.add(*contacts)
+                contact_ids = Contact.objects.filter(
+                    id__in=contacts_list, org=request.profile.org
+                ).values_list("id", flat=True)
+            sync_m2m(account_object, "contacts", contact_ids)
 
-            account_object.tags.clear()
+            tag_ids = []
             if data.get("tags"):
                 tags = json.loads(data.get("tags"))
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(slug=tag.lower())
-                    if tag_obj.exists():
-                        tag_obj = tag_obj[0]
-                    else:
-                        tag_obj = Tags.objects.create(name=tag)
-                    account_object.tags.add(tag_obj)
+                tag_ids = Tags.objects.resolve_ids(tags)
+            sync_m2m(account_object, "tags", tag_ids)
 
-            account_object.teams.clear()
+            team_ids = []
             if data.get("teams"):
                 teams_list = json.loads(data.get("teams"))
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                if teams:
-                    account_object.teams.add(*teams)
+                team_ids = Teams.objects.filter(
+                    id__in=teams_list, org=request.profile.org
+                ).values_list("id", flat=True)
+            sync_m2m(account_object, "teams", team_ids)
 
-            account_object.assigned_to.clear()
+            profile_ids = []
             if data.get("assigned_to"):
                 assigned_to_list = json.loads(data.get("assigned_to"))
-                profiles = Profile.objects.filter(
+                profile_ids = Profile.objects.filter(
                     id__in=assigned_to_list, org=request.profile.org, is_active=True
-                )
-                if profiles:
-                    account_object.assigned_to.add(*profiles)
+                ).values_list("id", flat=True)
+            recipients, _ = sync_m2m(account_object, "assigned_to", profile_ids)
 
             if self.request.FILES.get("account_attachment"):
                 attachment = Attachments()
@@ -293,12 +290,8 @@ class AccountDetailView(APIView):
                 attachment.attachment = self.request.FILES.get("account_attachment")
                 attachment.save()
 
-            assigned_to_list = list(
-                account_object.assigned_to.all().values_list("id", flat=True)
-            )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
             send_email_to_assigned_user.delay(
-                recipients,
+                list(recipients),
                 account_object.id,
             )
             return Response(
@@ -334,6 +327,7 @@ class AccountDetailView(APIView):
         )
 
     @extend_schema(tags=["Accounts"], parameters=swagger_params1.organization_params)
+    @conditional_get
     def get(self, request, pk, format=None):
         self.account = self.get_object(pk=pk)
         if self.account.org != request.profile.org:
@@ -406,13 +400,6 @@ class AccountDetailView(APIView):
                "teams" : TeamsSerializer(
                     Teams.objects.filter(org=self.request.profile.org), many=True
                 ).data,
-                "stages": STAGES,
-                "sources": SOURCES,
-                "countries": COUNTRIES,
-                "currencies": CURRENCY_CODES,
-                "case_types": CASE_TYPE,
-                "case_priority": PRIORITY_CHOICE,
-                "case_status": STATUS_CHOICE,
                 "comment_permission": comment_permission,
                 "invoices": InvoiceSerializer(
                     self.account.accounts_invoices.all(), many=True
@@ -425,6 +412,18 @@ class AccountDetailView(APIView):
                "status" : ["open","close"]
             }
         )
+        if wants_choices(self.request):
+            context.update(
+                {
+                    "stages": STAGES,
+                    "sources": SOURCES,
+                    "countries": COUNTRIES,
+                    "currencies": CURRENCY_CODES,
+                    "case_types": CASE_TYPE,
+                    "case_priority": PRIORITY_CHOICE,
+                    "case_status": STATUS_CHOICE,
+                }
+            )
         return Response(context)
 
     @extend_schema(
@@ -626,3 +625,42 @@ class AccountCreateMailView(APIView):
             {"error": True, "errors": serializer.errors},
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+
+class AccountsExportView(APIView):
+    """Stream every account the caller may see as CSV or NDJSON."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Accounts"], parameters=swagger_params1.export_params)
+    def get(self, request, format=None):
+        output = export_output(request)
+        if output is None:
+            return Response(
+                {"error": True, "errors": "Unsupported output format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = Account.objects.filter(org=request.profile.org)
+        if request.profile.role != "ADMIN" and not request.profile.is_admin:
+            queryset = filter_visible(queryset, request.profile)
+        return stream_export(ACCOUNT_EXPORT, queryset, output)
+
+
+class AccountsBulkAssignView(BulkAssignView):
+    """Add and remove assigned users on many accounts at once."""
+
+    model = Account
+    filters = {
+        "name": "name__icontains",
+        "city": "billing_city__icontains",
+        "industry": "industry__icontains",
+        "status": "status",
+    }
+
+    @extend_schema(
+        tags=["Accounts"],
+        parameters=swagger_params1.organization_params,
+        request=BulkAssignSerializer,
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
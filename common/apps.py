@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class CommonConfig(AppConfig):
     name = "common"
+
+    def ready(self):
+        from common import signals  # noqa: F401
+        from common.metrics import install_serializer_timing
+
+        install_serializer_timing()
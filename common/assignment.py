@@ -0,0 +1,193 @@
+"""
+Bulk (re)assignment of accounts and contacts.
+
+A request picks objects by ``ids`` or by a ``filter`` of list-view lookups
+and names the profiles to add to and remove from their ``assigned_to``. The
+through table is changed set-wise with ``add_m2m_links`` and
+``remove_m2m_links`` in one transaction. The ``updated_at`` of the objects
+that changed is bumped with one UPDATE per batch, so conditional GETs see
+the change. Every profile that gained or lost objects then gets a single
+digest email instead of one per object.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.m2m import (
+    M2M_BATCH_SIZE,
+    add_m2m_links,
+    chunked,
+    m2m_through,
+    remove_m2m_links,
+)
+from common.models import Profile
+from common.serializer import BulkAssignSerializer
+from common.tasks import ASSIGNMENT_DIGEST_LIMIT, send_assignment_digest
+from common.visibility import filter_visible
+
+ASSIGNMENT_FIELD = "assigned_to"
+
+
+def filter_assigned(queryset, profile_id):
+    """Objects ``profile_id`` is assigned to, without joining the through table."""
+    through, source, target = m2m_through(queryset.model, ASSIGNMENT_FIELD)
+    return queryset.filter(
+        pk__in=through.objects.filter(**{target: profile_id}).values(source)
+    )
+
+
+def org_profile_id(org, value):
+    """The id of the profile of ``org`` whose id is the text ``value``, or None."""
+    try:
+        profile_id = Profile._meta.pk.to_python(value)
+    except ValidationError:
+        return None
+    return (
+        Profile.objects.filter(id=profile_id, org=org).values_list("id", flat=True).first()
+    )
+
+
+def bulk_assign(queryset, add_ids, remove_ids, user=None):
+    """
+    Link ``add_ids`` to and unlink ``remove_ids`` from every object of
+    ``queryset``. Returns the object ids and, per profile, the ids of the
+    objects really added and removed (links that already were as asked are
+    left out).
+    """
+    model = queryset.model
+    through, source, target = m2m_through(model, ASSIGNMENT_FIELD)
+    add_ids, remove_ids = set(add_ids), set(remove_ids)
+    added, removed = defaultdict(list), defaultdict(list)
+    with transaction.atomic():
+        object_ids = list(queryset.order_by().values_list("pk", flat=True))
+        for chunk in chunked(object_ids, M2M_BATCH_SIZE):
+            existing = set(
+                through.objects.filter(
+                    **{source + "__in": chunk, target + "__in": add_ids | remove_ids}
+                ).values_list(source, target)
+            )
+            for object_id in chunk:
+                for profile_id in add_ids:
+                    if (object_id, profile_id) not in existing:
+                        added[profile_id].append(object_id)
+            for object_id, profile_id in existing:
+                if profile_id in remove_ids:
+                    removed[profile_id].append(object_id)
+        remove_m2m_links(model, ASSIGNMENT_FIELD, object_ids, remove_ids)
+        add_m2m_links(model, ASSIGNMENT_FIELD, object_ids, add_ids)
+        changed = {
+            object_id
+            for changes in (added, removed)
+            for ids in changes.values()
+            for object_id in ids
+        }
+        now = timezone.now()
+        for chunk in chunked(changed, M2M_BATCH_SIZE):
+            model._default_manager.filter(pk__in=chunk).update(
+                updated_at=now, updated_by=user
+            )
+    return object_ids, added, removed
+
+
+def send_assignment_digests(model, added, removed, user=None):
+    """
+    Queue one digest email per profile that gained or lost objects. The mail
+    only lists the first ``ASSIGNMENT_DIGEST_LIMIT`` objects of each kind, so
+    only those ids and the totals go through the broker.
+    """
+    for profile_id in set(added) | set(removed):
+        added_ids = added.get(profile_id, ())
+        removed_ids = removed.get(profile_id, ())
+        send_assignment_digest.delay(
+            str(profile_id),
+            model._meta.label,
+            [str(object_id) for object_id in added_ids[:ASSIGNMENT_DIGEST_LIMIT]],
+            len(added_ids),
+            [str(object_id) for object_id in removed_ids[:ASSIGNMENT_DIGEST_LIMIT]],
+            len(removed_ids),
+            str(user.id) if user else None,
+        )
+
+
+class BulkAssignView(APIView):
+    """
+    Base view of the bulk assignment endpoints. ``filters`` maps the keys a
+    ``filter`` may use to queryset lookups; ``assigned_to`` is always
+    accepted and picks the objects a profile is assigned to.
+    """
+
+    permission_classes = (IsAuthenticated,)
+    model = None
+    filters = {}
+
+    def get_queryset(self, request):
+        queryset = self.model.objects.filter(org=request.profile.org)
+        if request.profile.role != "ADMIN" and not request.profile.is_admin:
+            queryset = filter_visible(queryset, request.profile)
+        return queryset
+
+    def post(self, request, *args, **kwargs):
+        serializer = BulkAssignSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = serializer.validated_data
+        profile_ids = set(data["add"]) | set(data["remove"])
+        found = set(
+            Profile.objects.filter(
+                id__in=profile_ids, org=request.profile.org
+            ).values_list("id", flat=True)
+        )
+        if found != profile_ids:
+            return Response(
+                {"error": True, "errors": "Profiles not found in this organization"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queryset = self.get_queryset(request)
+        if data.get("ids"):
+            queryset = queryset.filter(pk__in=data["ids"])
+        else:
+            unknown = set(data["filter"]) - set(self.filters) - {ASSIGNMENT_FIELD}
+            if unknown:
+                return Response(
+                    {
+                        "error": True,
+                        "errors": "Unknown filters: %s" % ", ".join(sorted(unknown)),
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            for name, value in data["filter"].items():
+                if name != ASSIGNMENT_FIELD:
+                    queryset = queryset.filter(**{self.filters[name]: value})
+                    continue
+                profile_id = org_profile_id(request.profile.org, value)
+                if profile_id is None:
+                    return Response(
+                        {"error": True, "errors": "Profile not found in this organization"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                queryset = filter_assigned(queryset, profile_id)
+
+        object_ids, added, removed = bulk_assign(
+            queryset, data["add"], data["remove"], request.profile.user
+        )
+        send_assignment_digests(self.model, added, removed, request.profile.user)
+        return Response(
+            {
+                "error": False,
+                "message": "Assignments updated",
+                "objects": len(object_ids),
+                "added": sum(len(ids) for ids in added.values()),
+                "removed": sum(len(ids) for ids in removed.values()),
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,299 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.models import Org, Profile, User
+
+# Redis (shared) and in-process cache lifetimes for resolved users/profiles.
+# The in-process layer only saves the Redis round-trip within a burst of
+# requests, so it is kept short: signals can only clear it in the process
+# that made the change.
+AUTH_CACHE_TIMEOUT = getattr(settings, "AUTH_CACHE_TIMEOUT", 300)
+AUTH_LOCAL_CACHE_TIMEOUT = getattr(settings, "AUTH_LOCAL_CACHE_TIMEOUT", 5)
+AUTH_LOCAL_CACHE_SIZE = getattr(settings, "AUTH_LOCAL_CACHE_SIZE", 1024)
+# API keys resolve to (org_id, admin user_id); integrations reuse a handful of
+# keys at a high rate. The entries are keyed on a shared version that every
+# org/profile change bumps, so all workers drop them at once; the in-process
+# layer keeps the short AUTH_LOCAL_CACHE_TIMEOUT.
+API_KEY_CACHE_TIMEOUT = getattr(settings, "API_KEY_CACHE_TIMEOUT", 60)
+API_KEY_CACHE_SIZE = getattr(settings, "API_KEY_CACHE_SIZE", 256)
+# Never cached: left deferred on the rebuilt instances and loaded on access.
+UNCACHED_FIELDS = ("password",)
+
+
+class LocalCache(object):
+    """A small thread-safe LRU cache whose entries expire after ``timeout`` seconds."""
+
+    def __init__(self, timeout, max_size):
+        self.timeout = timeout
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_cache = LocalCache(AUTH_LOCAL_CACHE_TIMEOUT, AUTH_LOCAL_CACHE_SIZE)
+_api_key_cache = LocalCache(AUTH_LOCAL_CACHE_TIMEOUT, API_KEY_CACHE_SIZE)
+
+API_KEYS_VERSION_KEY = "auth:apikey-version"
+
+
+class AuthContext(object):
+    """The user, profile and org a request is acting as."""
+
+    def __init__(self, user=None, profile=None, org=None):
+        self.user = user
+        self.profile = profile
+        self.org = org
+
+
+def user_cache_key(user_id):
+    return "auth:user:%s" % user_id
+
+
+def profile_cache_key(user_id, org_id):
+    return "auth:profile:%s:%s" % (user_id, org_id)
+
+
+def api_keys_version():
+    version = cache.get(API_KEYS_VERSION_KEY)
+    if version is None:
+        # Seeded from the clock, like the response-cache generations, so an
+        # evicted version never goes back to one old entries were keyed on.
+        cache.add(API_KEYS_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(API_KEYS_VERSION_KEY)
+    return version
+
+
+def api_key_cache_key(api_key, version):
+    digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    return "auth:apikey:%s:%s" % (version, digest)
+
+
+def _cached(key, load):
+    value = _local_cache.get(key)
+    if value is not None:
+        return value
+    value = cache.get(key)
+    if value is None:
+        value = load()
+        cache.set(key, value, AUTH_CACHE_TIMEOUT)
+    _local_cache.set(key, value)
+    return value
+
+
+def instance_values(instance):
+    """The cacheable field values of ``instance`` (``{attname: value}``)."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in UNCACHED_FIELDS
+    }
+
+
+def build_instance(model, values):
+    """A new ``model`` instance of cached ``values``; every request gets its own."""
+    names = list(values)
+    return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+def get_user(user_id):
+    values = _cached(
+        user_cache_key(user_id),
+        lambda: instance_values(User.objects.get(id=user_id)),
+    )
+    return build_instance(User, values)
+
+
+def load_profile(user_id, org_id):
+    profile = Profile.objects.select_related("user", "org").get(
+        user_id=user_id, org_id=org_id, is_active=True
+    )
+    return {
+        "profile": instance_values(profile),
+        "user": instance_values(profile.user),
+        "org": instance_values(profile.org),
+    }
+
+
+def get_profile(user_id, org_id):
+    """Return the active profile of ``user_id`` in ``org_id`` with user and org loaded."""
+    values = _cached(
+        profile_cache_key(user_id, org_id), lambda: load_profile(user_id, org_id)
+    )
+    profile = build_instance(Profile, values["profile"])
+    profile.user = build_instance(User, values["user"])
+    profile.org = build_instance(Org, values["org"])
+    return profile
+
+
+def resolve_api_key(api_key):
+    """
+    Return ``(org_id, admin_user_id)`` for an org API key.
+
+    The admin is the most recently created active ADMIN profile of the org.
+    Raises ``AuthenticationFailed`` for unknown keys or orgs without one.
+    """
+    key = api_key_cache_key(api_key, api_keys_version())
+    resolved = _api_key_cache.get(key)
+    if resolved is not None:
+        return resolved
+    resolved = cache.get(key)
+    if resolved is None:
+        org_id = Org.objects.filter(api_key=api_key).values_list("id", flat=True).first()
+        if org_id is None:
+            raise AuthenticationFailed("Invalid API Key")
+        admin_user_id = (
+            Profile.objects.filter(org_id=org_id, role="ADMIN", is_active=True)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if admin_user_id is None:
+            raise AuthenticationFailed("Invalid API Key")
+        resolved = (org_id, admin_user_id)
+        cache.set(key, resolved, API_KEY_CACHE_TIMEOUT)
+    _api_key_cache.set(key, resolved)
+    return resolved
+
+
+def invalidate_api_keys(org_id):
+    """
+    Drop the cached API key resolutions in every worker.
+
+    A rotated key is no longer known by the time the org is saved, so the
+    shared version is bumped instead of deleting entries of ``org_id``.
+    """
+    try:
+        cache.incr(API_KEYS_VERSION_KEY)
+    except ValueError:
+        cache.add(API_KEYS_VERSION_KEY, time.time_ns(), None)
+    _api_key_cache.clear()
+
+
+def invalidate_user(user_id):
+    keys = [user_cache_key(user_id)]
+    keys += [
+        profile_cache_key(user_id, org_id)
+        for org_id in Profile.objects.filter(user_id=user_id).values_list(
+            "org_id", flat=True
+        )
+    ]
+    _delete_keys(keys)
+
+
+def invalidate_profile(user_id, org_id):
+    _delete_keys([profile_cache_key(user_id, org_id)])
+
+
+def invalidate_org(org_id):
+    _delete_keys(
+        [
+            profile_cache_key(user_id, org_id)
+            for user_id in Profile.objects.filter(org_id=org_id).values_list(
+                "user_id", flat=True
+            )
+        ]
+    )
+
+
+def _delete_keys(keys):
+    for key in keys:
+        _local_cache.delete(key)
+    cache.delete_many(keys)
+
+
+def decode_token(token):
+    """The payload of a valid, unexpired access token; refresh tokens are refused."""
+    try:
+        return AccessToken(token).payload
+    except TokenError as error:
+        raise AuthenticationFailed(str(error))
+
+
+def get_auth_context(request):
+    """
+    Resolve the user, profile and org of ``request``.
+
+    The JWT is decoded at most once per request: the result is memoized on
+    the underlying ``HttpRequest`` so the middleware and the DRF
+    authentication class share it.
+    """
+    request = getattr(request, "_request", request)
+    context = getattr(request, "_auth_context", None)
+    if context is None:
+        context = _resolve(request)
+        request._auth_context = context
+    return context
+
+
+def _resolve(request):
+    user_id = None
+    org_id = request.headers.get("org")
+
+    authorization = request.headers.get("Authorization")
+    if authorization:
+        parts = authorization.split(" ")
+        if len(parts) != 2:
+            raise AuthenticationFailed("Invalid token")
+        user_id = decode_token(parts[1])["user_id"]
+
+    api_key = request.headers.get("Token")
+    if api_key:
+        org_id, user_id = resolve_api_key(api_key)
+        request.META["org"] = org_id
+
+    if user_id is None:
+        return AuthContext()
+    if not org_id:
+        try:
+            user = get_user(user_id)
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found")
+        check_active(user)
+        return AuthContext(user=user)
+    try:
+        profile = get_profile(user_id, org_id)
+    except (Profile.DoesNotExist, ValidationError):
+        raise AuthenticationFailed("You are not a member of this organization")
+    check_active(profile.user)
+    return AuthContext(user=profile.user, profile=profile, org=profile.org)
+
+
+def check_active(user):
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive")
@@ -1,3 +1,5 @@
+import os
+import time
 import uuid
 
 # Django imports
@@ -7,14 +9,38 @@ from django.db import models
 from crum import get_current_user
 
 # Module imports
+from common.manager import BaseManager
 from common.mixins import AuditModel
 
 
+def uuid7():
+    """
+    A time-ordered UUID (RFC 9562 version 7).
+
+    The first 48 bits are the Unix time in milliseconds and the next 12 the
+    sub-millisecond fraction, so ids sort by creation time and new rows are
+    appended to the right edge of the primary key index instead of landing
+    on random pages. The remaining 62 bits are random.
+    """
+    nanoseconds = time.time_ns()
+    milliseconds, remainder = divmod(nanoseconds, 1_000_000)
+    fraction = remainder * 4096 // 1_000_000
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (milliseconds & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76
+    value |= fraction << 64
+    value |= 0b10 << 62
+    value |= random_bits
+    return uuid.UUID(int=value)
+
+
 class BaseModel(AuditModel):
     id = models.UUIDField(
-        default=uuid.uuid4, unique=True, editable=False, db_index=True, primary_key=True
+        default=uuid7, unique=True, editable=False, db_index=True, primary_key=True
     )
 
+    objects = BaseManager()
+
     class Meta:
         abstract = True
 
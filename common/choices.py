@@ -0,0 +1,49 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from common import utils
+
+# List and detail views only embed choice sets when the client passes
+# ``?include_choices=true``; everyone else reads them once from /api/meta/.
+CHOICES_QUERY_PARAM = "include_choices"
+
+
+def get_choice_sets():
+    from accounts.models import Account
+    from common.models import Document
+    from tasks.utils import PRIORITY_CHOICES, STATUS_CHOICES
+
+    return {
+        "countries": utils.COUNTRIES,
+        "currencies": utils.CURRENCY_CODES,
+        "industries": utils.INDCHOICES,
+        "account_types": utils.TYPECHOICES,
+        "account_status": Account.ACCOUNT_STATUS_CHOICE,
+        "roles": utils.ROLES,
+        "lead_status": utils.LEAD_STATUS,
+        "lead_sources": utils.LEAD_SOURCE,
+        "stages": utils.STAGES,
+        "sources": utils.SOURCES,
+        "case_types": utils.CASE_TYPE,
+        "case_priority": utils.PRIORITY_CHOICE,
+        "case_status": utils.STATUS_CHOICE,
+        "task_status": STATUS_CHOICES,
+        "task_priority": PRIORITY_CHOICES,
+        "document_status": Document.DOCUMENT_STATUS_CHOICE,
+        "event_parent_types": utils.EVENT_PARENT_TYPE,
+        "event_status": utils.EVENT_STATUS,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_choices_payload():
+    """Return the choice sets and their ETag; both are static for a given release."""
+    choices = get_choice_sets()
+    content = json.dumps(choices, sort_keys=True, separators=(",", ":"))
+    etag = '"%s"' % hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return choices, etag
+
+
+def wants_choices(request):
+    return request.query_params.get(CHOICES_QUERY_PARAM, "").lower() in ("1", "true")
@@ -0,0 +1,53 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+
+from common.response_cache import get_generations, get_scope
+
+# The generations must live in a cache every worker shares; with a
+# process-local cache another worker would answer 304 after a write.
+CONDITIONAL_GET_ENABLED = getattr(settings, "CONDITIONAL_GET_ENABLED", False)
+
+
+def conditional_get(handler):
+    """
+    Answer GETs with 304 when the client's ETag still matches.
+
+    The ETag is built from the path, query string, visibility scope and the
+    response-cache generations of the models the view reads, so checking it
+    costs one cache read and no query. The generations are bumped on every
+    save, delete and M2M change of those models. The models are the labels
+    of the handler's ``cache_response``, or the view's ``validator_labels``
+    when it has none.
+
+    No Last-Modified is sent: deletes and M2M changes do not advance any
+    ``updated_at``, so If-Modified-Since could not be answered correctly.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        if not CONDITIONAL_GET_ENABLED or getattr(request, "profile", None) is None:
+            return handler(self, request, *args, **kwargs)
+        labels = getattr(self, "validator_labels", getattr(handler, "cache_labels", ()))
+        generations = get_generations(request.profile.org_id, labels)
+        etag = '"%s"' % hashlib.sha256(
+            repr(
+                (
+                    request.path,
+                    sorted(request.query_params.lists()),
+                    get_scope(request),
+                    generations,
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(self, request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+        return response
+
+    return wrapper
@@ -0,0 +1,259 @@
+"""
+Denormalized dashboard counts.
+
+Every ``CounterSpec`` counts the rows of one model in an org: once for the
+whole org (what admins see) and once per non-admin profile, over the rows
+the profile is assigned to or created. The counts live in
+``DashboardCounter`` rows and ``common.signals`` applies +/- deltas to them
+on every save, delete and ``assigned_to`` change, so reading them is a
+single indexed query. A missing row is rebuilt with an exact COUNT the
+first time it is read or moved, which also backfills existing orgs.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from accounts.models import Account
+from common.m2m import m2m_through
+from common.models import DashboardCounter, Org, Profile
+from common.visibility import creator_profile_ids, filter_visible
+from contacts.models import Contact
+
+DASHBOARD_RECENT_LIMIT = getattr(settings, "DASHBOARD_RECENT_LIMIT", 10)
+
+
+class CounterSpec(object):
+    """The ``model`` rows of an org matching ``conditions`` (field -> value)."""
+
+    member_field = "assigned_to"
+
+    def __init__(self, name, model, **conditions):
+        self.name = name
+        self.model = model
+        self.conditions = conditions
+
+    @property
+    def fields(self):
+        return ("org_id", "created_by_id") + tuple(self.conditions)
+
+    def counts(self, values):
+        return all(values[field] == value for field, value in self.conditions.items())
+
+    def queryset(self, org_id, profile_id=None):
+        queryset = self.model.objects.filter(org_id=org_id, **self.conditions)
+        if profile_id is not None:
+            queryset = filter_visible(queryset, profile_id)
+        return queryset
+
+    def member_links(self):
+        return m2m_through(self.model, self.member_field)
+
+
+COUNTERS = (
+    CounterSpec("accounts", Account, status="open"),
+    CounterSpec("contacts", Contact),
+)
+COUNTERS_BY_MODEL = {spec.model: spec for spec in COUNTERS}
+
+
+def rebuild_counter(spec, org_id, profile_id=None):
+    """Recount one counter from scratch and store it."""
+    value = spec.queryset(org_id, profile_id).count()
+    lookup = {"org_id": org_id, "profile_id": profile_id, "name": spec.name}
+    try:
+        with transaction.atomic():
+            DashboardCounter.objects.update_or_create(defaults={"value": value}, **lookup)
+    except IntegrityError:
+        # Created concurrently; the other writer counted the same rows.
+        DashboardCounter.objects.filter(**lookup).update(value=value)
+    return value
+
+
+def reset_profile_counters(org_id, specs=COUNTERS):
+    """Drop the per-profile rows of an org; they are recounted when next read."""
+    DashboardCounter.objects.filter(
+        org_id=org_id, name__in=[spec.name for spec in specs], profile__isnull=False
+    ).delete()
+
+
+def rebuild_org_counters(org_id, specs=COUNTERS):
+    reset_profile_counters(org_id, specs)
+    for spec in specs:
+        rebuild_counter(spec, org_id)
+
+
+def get_counters(profile, admin):
+    """``{name: count}`` of every counter visible to ``profile``, in one query."""
+    profile_id = None if admin else profile.id
+    values = dict(
+        DashboardCounter.objects.filter(
+            org_id=profile.org_id,
+            profile=profile_id,
+            name__in=[spec.name for spec in COUNTERS],
+        ).values_list("name", "value")
+    )
+    for spec in COUNTERS:
+        if spec.name not in values:
+            values[spec.name] = rebuild_counter(spec, profile.org_id, profile_id)
+    return values
+
+
+def apply_deltas(spec, deltas):
+    for (org_id, profile_id), delta in deltas.items():
+        if not delta or org_id is None:
+            continue
+        updated = DashboardCounter.objects.filter(
+            org_id=org_id, profile=profile_id, name=spec.name
+        ).update(value=F("value") + delta)
+        if not updated and owner_exists(org_id, profile_id):
+            rebuild_counter(spec, org_id, profile_id)
+
+
+def owner_exists(org_id, profile_id):
+    # Deleting an org or profile cascades to its objects, whose deltas must
+    # not resurrect a counter row for it.
+    if profile_id is not None:
+        return Profile.objects.filter(pk=profile_id, org_id=org_id).exists()
+    return Org.objects.filter(pk=org_id).exists()
+
+
+def visibility(spec, values, member_ids):
+    """``(org_id, profile ids)`` an object with ``values`` is counted for, or None."""
+    if values is None or not spec.counts(values):
+        return None
+    profile_ids = set(member_ids)
+    creator_id = creator_profile_ids([values]).get(values["pk"])
+    if creator_id:
+        profile_ids.add(creator_id)
+    return values["org_id"], profile_ids
+
+
+def object_values(spec, instance):
+    values = {field: getattr(instance, field) for field in spec.fields}
+    values["pk"] = instance.pk
+    return values
+
+
+def member_ids(spec, object_id):
+    through, source, target = spec.member_links()
+    return list(
+        through.objects.filter(**{source: object_id}).values_list(target, flat=True)
+    )
+
+
+def record_changes(spec, before, after):
+    """Apply the deltas of an object going from ``before`` to ``after`` visibility."""
+    deltas = Counter()
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        org_id, profile_ids = state
+        deltas[(org_id, None)] += sign
+        for profile_id in profile_ids:
+            deltas[(org_id, profile_id)] += sign
+    apply_deltas(spec, deltas)
+
+
+def object_loaded(spec, instance):
+    """post_init: remember the counted values the instance starts with."""
+    if all(field in instance.__dict__ for field in spec.fields):
+        instance._counter_loaded = object_values(spec, instance)
+
+
+def object_saving(spec, instance, update_fields=None):
+    """
+    pre_save: remember the stored values the save is about to replace.
+
+    Saves that leave every counted field as it was loaded skip the counters
+    altogether, without reading the stored row. A concurrent change of those
+    fields in between is left to ``rebuild_dashboard_counters``.
+    """
+    instance._counter_previous = None
+    instance._counter_skip = False
+    if instance._state.adding:
+        return
+    if update_fields is not None:
+        attnames = {spec.model._meta.get_field(name).attname for name in update_fields}
+        if not attnames.intersection(spec.fields):
+            instance._counter_skip = True
+            return
+    loaded = getattr(instance, "_counter_loaded", None)
+    if loaded is not None and loaded == object_values(spec, instance):
+        instance._counter_skip = True
+        return
+    instance._counter_previous = (
+        spec.model._default_manager.filter(pk=instance.pk)
+        .values("pk", *spec.fields)
+        .first()
+    )
+
+
+def object_saved(spec, instance, created):
+    skip = getattr(instance, "_counter_skip", False)
+    instance._counter_loaded = object_values(spec, instance)
+    if skip:
+        return
+    previous = getattr(instance, "_counter_previous", None)
+    members = [] if created else member_ids(spec, instance.pk)
+    record_changes(
+        spec,
+        visibility(spec, previous, members),
+        visibility(spec, instance._counter_loaded, members),
+    )
+
+
+def object_deleting(spec, instance):
+    """pre_delete: capture the visibility before the member links are cascaded."""
+    instance._counter_previous = visibility(
+        spec, object_values(spec, instance), member_ids(spec, instance.pk)
+    )
+
+
+def object_deleted(spec, instance):
+    record_changes(spec, getattr(instance, "_counter_previous", None), None)
+
+
+def members_changing(spec, instance, action, reverse, pk_set):
+    """pre_remove/pre_clear: remember which links really exist before they go."""
+    through, source, target = spec.member_links()
+    links = through.objects.all()
+    if reverse:
+        links = links.filter(**{target: instance.pk})
+        if action == "pre_remove":
+            links = links.filter(**{source + "__in": pk_set})
+    else:
+        links = links.filter(**{source: instance.pk})
+        if action == "pre_remove":
+            links = links.filter(**{target + "__in": pk_set})
+    instance._counter_unlinked = list(links.values_list(source, target))
+
+
+def members_changed(spec, instance, action, reverse, pk_set):
+    if action == "post_add":
+        if reverse:
+            links = [(object_id, instance.pk) for object_id in pk_set]
+        else:
+            links = [(instance.pk, profile_id) for profile_id in pk_set]
+        sign = 1
+    else:
+        links = getattr(instance, "_counter_unlinked", [])
+        sign = -1
+    if not links:
+        return
+    rows = {
+        row["pk"]: row
+        for row in spec.model._default_manager.filter(
+            pk__in={object_id for object_id, _ in links}
+        ).values("pk", *spec.fields)
+    }
+    creators = creator_profile_ids(rows.values())
+    deltas = Counter()
+    for object_id, profile_id in links:
+        row = rows.get(object_id)
+        # The creator sees the object whether or not they are assigned.
+        if row is None or not spec.counts(row) or creators.get(object_id) == profile_id:
+            continue
+        deltas[(row["org_id"], profile_id)] += sign
+    apply_deltas(spec, deltas)
@@ -0,0 +1,31 @@
+"""
+Helpers for checking Postgres query plans of ORM querysets.
+
+``explain`` returns the root node of ``EXPLAIN (FORMAT JSON)``; the other
+helpers walk it so tests can assert which indexes a query uses.
+"""
+import json
+
+
+def explain(queryset, analyze=False):
+    """The root plan node of ``queryset``."""
+    return json.loads(queryset.explain(format="json", analyze=analyze))[0]["Plan"]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def index_names(plan):
+    """Names of the indexes the plan scans."""
+    return {node["Index Name"] for node in plan_nodes(plan) if "Index Name" in node}
+
+
+def seq_scanned_tables(plan):
+    return {
+        node["Relation Name"]
+        for node in plan_nodes(plan)
+        if node["Node Type"] == "Seq Scan"
+    }
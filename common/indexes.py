@@ -0,0 +1,16 @@
+"""
+Index definitions shared by the models of several apps.
+"""
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
+
+
+def trigram_index(field_name, name):
+    """
+    A pg_trgm GIN index serving ``<field_name>__icontains``.
+
+    On Postgres ``icontains`` compiles to ``UPPER(col) LIKE UPPER(%s)``, so
+    the index is built on ``UPPER(col)``; a plain column index would not be
+    considered for it.
+    """
+    return GinIndex(OpClass(Upper(field_name), name="gin_trgm_ops"), name=name)
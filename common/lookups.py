@@ -0,0 +1,61 @@
+"""
+Org-scoped lookup collections (contacts, teams, tags, users) used to fill
+pickers in the UI. Each one is cached per org under its own key and dropped
+by the receivers in ``common.signals`` when a write touches it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from accounts.models import Tags
+from accounts.serializer import TagsSerailizer
+from common.models import Profile
+from contacts.models import Contact
+from teams.models import Teams
+from teams.serializer import TeamsSerializer
+
+LOOKUP_CACHE_TIMEOUT = getattr(settings, "LOOKUP_CACHE_TIMEOUT", 600)
+
+
+def contacts_lookup(org):
+    return Contact.objects.filter(org=org).values("id", "first_name")
+
+
+def teams_lookup(org):
+    return TeamsSerializer(Teams.objects.filter(org=org), many=True).data
+
+
+def tags_lookup(org):
+    return TagsSerailizer(
+        Tags.objects.filter(account__org=org).distinct(), many=True
+    ).data
+
+
+def users_lookup(org):
+    return Profile.objects.filter(is_active=True, org=org).values("id", "user__email")
+
+
+LOOKUPS = {
+    "contacts": contacts_lookup,
+    "teams": teams_lookup,
+    "tags": tags_lookup,
+    "users": users_lookup,
+}
+
+
+def lookup_cache_key(org_id, name):
+    return "lookups:%s:%s" % (org_id, name)
+
+
+def get_lookup(org, name):
+    key = lookup_cache_key(org.id, name)
+    data = cache.get(key)
+    if data is None:
+        data = [dict(item) for item in LOOKUPS[name](org)]
+        cache.set(key, data, LOOKUP_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_lookups(org_ids, *names):
+    cache.delete_many(
+        [lookup_cache_key(org_id, name) for org_id in set(org_ids) for name in names]
+    )
@@ -0,0 +1,124 @@
+"""
+Set-based helpers for ManyToMany through tables.
+
+They read and write the auto-created through models directly, so a change
+touching thousands of (object, profile) pairs costs a handful of statements
+instead of one ``add()``/``remove()`` round-trip per pair. Ids are expected
+in the form the ORM returns them (``UUID`` instances for ``BaseModel``).
+"""
+from itertools import islice
+
+from django.db import connections, router
+from django.dispatch import Signal
+
+M2M_BATCH_SIZE = 1000
+
+# Sent by the bulk helpers, which bypass ``m2m_changed``, with the
+# ``field_name`` and the ``source_ids`` of each batch that changed.
+m2m_links_changed = Signal()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def m2m_through(model, field_name):
+    """Return the through model of ``model.<field_name>`` and its source/target FK attnames."""
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = through._meta.get_field(field.m2m_field_name()).attname
+    target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+    return through, source, target
+
+
+def add_m2m_links(model, field_name, source_ids, target_ids, batch_size=M2M_BATCH_SIZE):
+    """
+    Link every source id to every target id on ``model.<field_name>``.
+
+    Each batch of about ``batch_size`` pairs is one ``INSERT ... SELECT``
+    over the cross product of the ids with ``ON CONFLICT DO NOTHING``, so
+    the pairs that already exist are skipped by the database and nothing is
+    read first. Returns the number of rows inserted, as reported by the
+    database.
+    """
+    through, source, target = m2m_through(model, field_name)
+    target_ids = list(set(target_ids))
+    if not target_ids:
+        return 0
+    fields = {field.attname: field for field in through._meta.concrete_fields}
+    connection = connections[router.db_for_write(through)]
+    quote = connection.ops.quote_name
+    sql = (
+        "INSERT INTO %s (%s, %s) SELECT s, t FROM unnest(%%s::%s[]) AS s "
+        "CROSS JOIN unnest(%%s::%s[]) AS t ON CONFLICT DO NOTHING"
+        % (
+            quote(through._meta.db_table),
+            quote(fields[source].column),
+            quote(fields[target].column),
+            fields[source].db_type(connection),
+            fields[target].db_type(connection),
+        )
+    )
+    inserted = 0
+    sources_per_batch = max(1, batch_size // len(target_ids))
+    for chunk in chunked(source_ids, sources_per_batch):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [chunk, target_ids])
+            count = cursor.rowcount
+        if count:
+            inserted += count
+            m2m_links_changed.send(sender=model, field_name=field_name, source_ids=chunk)
+    return inserted
+
+
+def remove_m2m_links(model, field_name, source_ids, target_ids, batch_size=M2M_BATCH_SIZE):
+    """
+    Unlink the given target ids from the given source ids on ``model.<field_name>``.
+
+    Issues one ``DELETE`` per ``batch_size`` source ids so that lock time on
+    the through table stays bounded. Returns the number of rows deleted.
+    """
+    through, source, target = m2m_through(model, field_name)
+    target_ids = set(target_ids)
+    if not target_ids:
+        return 0
+    deleted = 0
+    for chunk in chunked(source_ids, batch_size):
+        count, _ = through.objects.filter(
+            **{source + "__in": chunk, target + "__in": target_ids}
+        ).delete()
+        if count:
+            deleted += count
+            m2m_links_changed.send(sender=model, field_name=field_name, source_ids=chunk)
+    return deleted
+
+
+def sync_m2m(instance, field_name, target_ids):
+    """
+    Make ``instance.<field_name>`` link exactly ``target_ids``.
+
+    The current links are read from the through table and only the difference
+    is written: one ``DELETE`` for the stale links and one ``INSERT`` for the
+    new ones. Both go through the related manager, so ``m2m_changed`` still
+    fires, but only for the delta. ``target_ids`` may be raw strings from a
+    request. Returns the ``(added, removed)`` id sets.
+    """
+    through, source, target = m2m_through(type(instance), field_name)
+    current = set(
+        through.objects.filter(**{source: instance.pk}).values_list(target, flat=True)
+    )
+    target_pk = instance._meta.get_field(field_name).related_model._meta.pk
+    wanted = {target_pk.to_python(target_id) for target_id in target_ids}
+    added = wanted - current
+    removed = current - wanted
+    manager = getattr(instance, field_name)
+    if removed:
+        manager.remove(*removed)
+    if added:
+        manager.add(*added)
+    return added, removed
@@ -1,4 +1,73 @@
+from crum import get_current_user
 from django.contrib.auth.models import BaseUserManager
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+
+# Sent by BaseQuerySet.bulk_create/bulk_update, which bypass save() and
+# its signals, with the ``objs`` written, whether they were ``created`` and,
+# for updates, the ``update_fields``. Objects an ``ignore_conflicts`` insert
+# skipped are left out.
+bulk_saved = Signal()
+
+
+def audit_user(user=None):
+    """The user to stamp: ``user`` if given, else the logged in one, else None."""
+    if user is None:
+        user = get_current_user()
+    if user is None or user.is_anonymous:
+        return None
+    return user
+
+
+class BaseQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, user=None, **kwargs):
+        """
+        ``bulk_create`` that stamps created_by/updated_by like
+        ``BaseModel.save`` does, resolving the user once for the whole
+        batch. Background jobs without a request pass ``user``.
+
+        With ``ignore_conflicts`` the database does not report which rows it
+        skipped; the pks are generated in Python, so the inserted ones are
+        read back and only those objects are sent with ``bulk_saved``.
+        """
+        objs = list(objs)
+        user = audit_user(user)
+        for obj in objs:
+            obj.created_by = user
+            obj.updated_by = user
+        objs = super().bulk_create(objs, *args, **kwargs)
+        saved = objs
+        if saved and kwargs.get("ignore_conflicts"):
+            inserted = set(
+                self.model._default_manager.filter(
+                    pk__in=[obj.pk for obj in objs]
+                ).values_list("pk", flat=True)
+            )
+            saved = [obj for obj in objs if obj.pk in inserted]
+        if saved:
+            bulk_saved.send(sender=self.model, objs=saved, created=True, update_fields=None)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, user=None, **kwargs):
+        """``bulk_update`` that also writes updated_by and updated_at."""
+        objs = list(objs)
+        user = audit_user(user)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_by = user
+            obj.updated_at = now
+        fields = list(fields)
+        fields += [name for name in ("updated_by", "updated_at") if name not in fields]
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if objs:
+            bulk_saved.send(sender=self.model, objs=objs, created=False, update_fields=fields)
+        return rows
+
+
+class BaseManager(models.Manager.from_queryset(BaseQuerySet)):
+    pass
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
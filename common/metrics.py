@@ -0,0 +1,224 @@
+"""
+Per-route request metrics kept in process memory.
+
+``QueryMetricsMiddleware`` fills a ``RequestMetrics`` for every request and
+folds it into ``registry``; ``metrics_view`` renders the registry in the
+Prometheus text exposition format. Each worker process keeps its own
+registry, so scrape every worker (or run a single one) when profiling.
+"""
+import contextvars
+import functools
+import threading
+import time
+from collections import defaultdict
+
+SLOWEST_SQL_MAX_LENGTH = 1000
+
+# The ``RequestMetrics`` of the request being served, for serializer timing.
+current_metrics = contextvars.ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics(object):
+    """Queries, SQL time, serializer time and render time of a single request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_sql = ""
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+        self._render_started = None
+        self._serializing = False
+
+    def record_query(self, sql, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_sql = sql[:SLOWEST_SQL_MAX_LENGTH]
+
+    def render_started(self):
+        self._render_started = time.perf_counter()
+
+    def render_finished(self):
+        if self._render_started is not None:
+            self.render_seconds += time.perf_counter() - self._render_started
+            self._render_started = None
+
+
+def timed_serializer_data(getter):
+    """
+    Wrap the ``BaseSerializer.data`` getter to add the time of outermost
+    calls (including the queries they trigger) to the current request.
+    Nested ``.data`` calls, e.g. from a SerializerMethodField, are not
+    counted twice.
+    """
+
+    @functools.wraps(getter)
+    def data(serializer):
+        metrics = current_metrics.get()
+        if metrics is None or metrics._serializing:
+            return getter(serializer)
+        metrics._serializing = True
+        start = time.perf_counter()
+        try:
+            return getter(serializer)
+        finally:
+            metrics.serialize_seconds += time.perf_counter() - start
+            metrics._serializing = False
+
+    data.timed = True
+    return data
+
+
+def install_serializer_timing():
+    """Time serializer ``.data`` into ``current_metrics``; called once from CommonConfig."""
+    from rest_framework.serializers import BaseSerializer
+
+    getter = BaseSerializer.data.fget
+    if not getattr(getter, "timed", False):
+        BaseSerializer.data = property(timed_serializer_data(getter))
+
+
+class QueryRecorder(object):
+    """A ``connection.execute_wrapper`` that times every statement into ``metrics``."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.record_query(sql, time.perf_counter() - start)
+
+
+class RouteStats(object):
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.render_seconds = 0.0
+        self.duration_seconds = 0.0
+
+
+class MetricsRegistry(object):
+    """Thread-safe aggregation of ``RequestMetrics`` keyed by (method, route)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(RouteStats)
+        self._cache_results = defaultdict(int)
+
+    def observe(self, method, route, metrics, duration_seconds, over_budget=False):
+        with self._lock:
+            stats = self._routes[(method, route)]
+            stats.requests += 1
+            stats.over_budget += int(over_budget)
+            stats.queries += metrics.queries
+            stats.max_queries = max(stats.max_queries, metrics.queries)
+            stats.sql_seconds += metrics.sql_seconds
+            stats.slowest_seconds = max(stats.slowest_seconds, metrics.slowest_seconds)
+            stats.serialize_seconds += metrics.serialize_seconds
+            stats.render_seconds += metrics.render_seconds
+            stats.duration_seconds += duration_seconds
+
+    def count_cache(self, view, result):
+        """Count a response cache lookup of ``view``: hit, wait_hit or miss."""
+        with self._lock:
+            self._cache_results[(view, result)] += 1
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._cache_results.clear()
+
+    def render_prometheus(self):
+        families = (
+            ("crm_http_requests_total", "counter", "Requests served.", "requests"),
+            (
+                "crm_http_request_duration_seconds_total",
+                "counter",
+                "Wall time spent serving requests.",
+                "duration_seconds",
+            ),
+            ("crm_db_queries_total", "counter", "SQL statements executed.", "queries"),
+            (
+                "crm_db_query_seconds_total",
+                "counter",
+                "Time spent executing SQL statements.",
+                "sql_seconds",
+            ),
+            (
+                "crm_db_queries_per_request_max",
+                "gauge",
+                "Most SQL statements executed by a single request.",
+                "max_queries",
+            ),
+            (
+                "crm_db_slowest_query_seconds",
+                "gauge",
+                "Duration of the slowest SQL statement seen.",
+                "slowest_seconds",
+            ),
+            (
+                "crm_serializer_seconds_total",
+                "counter",
+                "Time spent building serializer data, including its queries.",
+                "serialize_seconds",
+            ),
+            (
+                "crm_response_render_seconds_total",
+                "counter",
+                "Time spent rendering response bodies to JSON.",
+                "render_seconds",
+            ),
+            (
+                "crm_query_budget_exceeded_total",
+                "counter",
+                "Requests that executed more SQL statements than QUERY_BUDGET.",
+                "over_budget",
+            ),
+        )
+        with self._lock:
+            routes = sorted(
+                (key, vars(stats).copy()) for key, stats in self._routes.items()
+            )
+            cache_results = sorted(self._cache_results.items())
+        lines = []
+        for name, kind, help_text, attr in families:
+            lines.append("# HELP %s %s" % (name, help_text))
+            lines.append("# TYPE %s %s" % (name, kind))
+            for (method, route), stats in routes:
+                lines.append(
+                    '%s{method="%s",route="%s"} %s'
+                    % (name, _escape(method), _escape(route), _format(stats[attr]))
+                )
+        name = "crm_response_cache_requests_total"
+        lines.append("# HELP %s Response cache lookups by view and result." % name)
+        lines.append("# TYPE %s counter" % name)
+        for (view, result), count in cache_results:
+            lines.append(
+                '%s{view="%s",result="%s"} %d'
+                % (name, _escape(view), _escape(result), count)
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+registry = MetricsRegistry()
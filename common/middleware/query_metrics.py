@@ -0,0 +1,74 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from common.metrics import QueryRecorder, RequestMetrics, current_metrics, registry
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_ROUTE = "<unresolved>"
+
+
+def get_route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED_ROUTE
+    return "/" + match.route.lstrip("^").rstrip("$")
+
+
+class QueryMetricsMiddleware(object):
+    """
+    Count the SQL statements and time of every request and aggregate them per
+    URL route into ``common.metrics.registry``.
+
+    Requests executing more than ``settings.QUERY_BUDGET`` statements are
+    logged together with their slowest statement. Serializer time covers
+    building serializer ``.data`` (see ``install_serializer_timing``); render
+    time covers ``response.render()``, i.e. turning that data into JSON.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, "QUERY_BUDGET", 50)
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        request.query_metrics = metrics
+        recorder = QueryRecorder(metrics)
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        duration = time.perf_counter() - start
+
+        route = get_route(request)
+        over_budget = bool(self.query_budget) and metrics.queries > self.query_budget
+        registry.observe(request.method, route, metrics, duration, over_budget)
+        if over_budget:
+            logger.warning(
+                "%s %s ran %d queries (budget %d) in %.1fms of SQL; "
+                "slowest %.1fms: %s",
+                request.method,
+                route,
+                metrics.queries,
+                self.query_budget,
+                metrics.sql_seconds * 1000,
+                metrics.slowest_seconds * 1000,
+                metrics.slowest_sql,
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, "query_metrics", None)
+        if metrics is not None:
+            metrics.render_started()
+            response.add_post_render_callback(lambda _: metrics.render_finished())
+        return response
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32)),
+                ('value', models.IntegerField(default=0)),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_counters', to='common.org')),
+                ('profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_counters', to='common.profile')),
+            ],
+            options={
+                'verbose_name': 'DashboardCounter',
+                'verbose_name_plural': 'DashboardCounters',
+                'db_table': 'dashboard_counter',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardcounter',
+            constraint=models.UniqueConstraint(fields=('org', 'profile', 'name'), name='dashboard_counter_profile_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='dashboardcounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('profile__isnull', True)), fields=('org', 'name'), name='dashboard_counter_org_unique'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+from itertools import chain, islice
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+VISIBLE_MODELS = [("accounts", "Account"), ("contacts", "Contact")]
+BATCH_SIZE = 1000
+
+
+def backfill_object_visibility(apps, schema_editor):
+    # Self-contained on purpose: the table starts empty, so every pair of
+    # (object, creator's profile in its org) and (object, assignee) is
+    # inserted, with historical models only.
+    Profile = apps.get_model("common", "Profile")
+    ObjectVisibility = apps.get_model("common", "ObjectVisibility")
+    profiles = {
+        (org_id, user_id): profile_id
+        for org_id, user_id, profile_id in Profile.objects.values_list(
+            "org_id", "user_id", "id"
+        ).iterator()
+    }
+    for app_label, model_name in VISIBLE_MODELS:
+        model = apps.get_model(app_label, model_name)
+        object_type = "%s.%s" % (app_label, model_name)
+        creators = (
+            (object_id, profiles.get((org_id, user_id)))
+            for object_id, org_id, user_id in model.objects.exclude(org=None)
+            .exclude(created_by=None)
+            .values_list("pk", "org_id", "created_by_id")
+            .iterator()
+        )
+        field = model._meta.get_field("assigned_to")
+        through = field.remote_field.through
+        members = through.objects.values_list(
+            through._meta.get_field(field.m2m_field_name()).attname,
+            through._meta.get_field(field.m2m_reverse_field_name()).attname,
+        ).iterator()
+        pairs = (
+            ObjectVisibility(object_type=object_type, object_id=object_id, profile_id=profile_id)
+            for object_id, profile_id in chain(creators, members)
+            if profile_id
+        )
+        while True:
+            batch = list(islice(pairs, BATCH_SIZE))
+            if not batch:
+                break
+            ObjectVisibility.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_initial'),
+        ('contacts', '0001_initial'),
+        ('common', '0003_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ObjectVisibility',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=64)),
+                ('object_id', models.UUIDField()),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visible_objects', to='common.profile')),
+            ],
+            options={
+                'verbose_name': 'ObjectVisibility',
+                'verbose_name_plural': 'ObjectVisibilities',
+                'db_table': 'object_visibility',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='objectvisibility',
+            constraint=models.UniqueConstraint(fields=('profile', 'object_type', 'object_id'), name='object_visibility_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='objectvisibility',
+            index=models.Index(fields=['object_type', 'object_id'], name='object_visibility_object'),
+        ),
+        migrations.RunPython(backfill_object_visibility, migrations.RunPython.noop),
+    ]
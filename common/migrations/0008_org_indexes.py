@@ -0,0 +1,28 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('common', '0007_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='profile',
+            index=models.Index(fields=['org', 'is_active', 'created_at', 'id'], name='profile_org_active_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='document',
+            index=models.Index(fields=['org', 'status', 'created_at', 'id'], name='document_org_status_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='document',
+            index=models.Index(models.F('org'), django.db.models.functions.text.Upper('title'), name='document_org_upper_title'),
+        ),
+    ]
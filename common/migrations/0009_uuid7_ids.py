@@ -0,0 +1,55 @@
+import common.base
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Only the Python-side default changes: existing rows keep their
+    # uuid4 keys and no table is rewritten.
+
+    dependencies = [
+        ('common', '0008_org_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='address',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='apisettings',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='attachments',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='org',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
@@ -6,8 +6,12 @@ import uuid
 import arrow
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from .manager import UserManager
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
@@ -24,7 +28,8 @@ from common.templatetags.common_tags import (
     is_document_file_zip,
 )
 from common.utils import COUNTRIES, ROLES
-from common.base import BaseModel
+from common.base import BaseModel, uuid7
+from common.indexes import trigram_index
 
 
 def img_url(self, filename):
@@ -34,7 +39,7 @@ def img_url(self, filename):
 
 class User(AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(
-        default=uuid.uuid4, unique=True, editable=False, db_index=True, primary_key=True
+        default=uuid7, unique=True, editable=False, db_index=True, primary_key=True
     )
     email = models.EmailField(_("email address"), blank=True, unique=True)
     profile_pic = models.CharField(
@@ -56,6 +61,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name_plural = "Users"
         db_table = "users"
         ordering = ("-is_active",)
+        indexes = [trigram_index("email", "users_email_trgm")]
 
     def __str__(self):
         return self.email
@@ -82,6 +88,7 @@ class Address(BaseModel):
         verbose_name_plural = "Addresses"
         db_table = "address"
         ordering = ("-created_at",)
+        indexes = [trigram_index("city", "address_city_trgm")]
 
     def __str__(self):
         return self.city if self.city else ""
@@ -214,6 +221,12 @@ class Profile(BaseModel):
         db_table = "profile"
         ordering = ("-created_at",)
         unique_together = ["user", "org"]
+        indexes = [
+            models.Index(
+                fields=["org", "is_active", "created_at", "id"],
+                name="profile_org_active_created",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email} <{self.org.name}>"
@@ -319,12 +332,22 @@ class Document(BaseModel):
         blank=True,
         related_name="document_org",
     )
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Document"
         verbose_name_plural = "Documents"
         db_table = "document"
         ordering = ("-created_at",)
+        indexes = [
+            GinIndex(fields=["search_vector"], name="document_search_vector"),
+            trigram_index("title", "document_title_trgm"),
+            models.Index(
+                fields=["org", "status", "created_at", "id"],
+                name="document_org_status_created",
+            ),
+            models.Index(F("org"), Upper("title"), name="document_org_upper_title"),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -418,3 +441,78 @@ class APISettings(BaseModel):
         if not self.apikey or self.apikey is None or self.apikey == "":
             self.apikey = generate_key()
         super().save(*args, **kwargs)
+
+
+class DashboardCounter(models.Model):
+    """
+    Denormalized dashboard count of one collection (``name``) in an org.
+
+    Rows with no ``profile`` hold the org-wide count that admins see; the
+    others hold what a single non-admin profile can see. ``common.counters``
+    keeps them current from model signals.
+    """
+
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="dashboard_counters"
+    )
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="dashboard_counters",
+    )
+    name = models.CharField(max_length=32)
+    value = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "DashboardCounter"
+        verbose_name_plural = "DashboardCounters"
+        db_table = "dashboard_counter"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "profile", "name"],
+                name="dashboard_counter_profile_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["org", "name"],
+                condition=models.Q(profile__isnull=True),
+                name="dashboard_counter_org_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name}={self.value}"
+
+
+class ObjectVisibility(models.Model):
+    """
+    One row per (object, profile) pair where a non-admin profile may see
+    the object: it created it or is assigned to it. ``common.visibility``
+    keeps the table in step with those relations.
+    """
+
+    object_type = models.CharField(max_length=64)
+    object_id = models.UUIDField()
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="visible_objects"
+    )
+
+    class Meta:
+        verbose_name = "ObjectVisibility"
+        verbose_name_plural = "ObjectVisibilities"
+        db_table = "object_visibility"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "object_type", "object_id"],
+                name="object_visibility_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["object_type", "object_id"], name="object_visibility_object"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type}:{self.object_id}"
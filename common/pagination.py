@@ -0,0 +1,119 @@
+import base64
+import binascii
+import json
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
+
+
+class KeysetPagination(object):
+    """
+    Cursor pagination ordered on (created_at, id), newest first.
+
+    The cursor handed out to clients is an opaque token holding the
+    (created_at, id) of the last row of the page, so every page is a single
+    indexed range scan no matter how deep the client goes. No COUNT query
+    is issued unless the client asks for it with ``?with_count=true``.
+
+    Views use it the same way they used ``LimitOffsetPagination``: mix it in
+    and call ``paginate_queryset``, then read ``next_cursor``,
+    ``previous_cursor`` and ``count`` from the view.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None, cursor_query_param=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.count = queryset.count() if self.wants_count(request) else None
+
+        cursor = self.decode_cursor(
+            request.query_params.get(cursor_query_param or self.cursor_query_param)
+        )
+        reverse = False
+        if cursor is None:
+            queryset = queryset.order_by("-created_at", "-id")
+        else:
+            created_at, pk, reverse = cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                ).order_by("created_at", "id")
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                ).order_by("-created_at", "-id")
+
+        # Fetch one extra row to find out whether there is another page.
+        results = list(queryset[: self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[: self.limit]
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_cursor = None
+        self.previous_cursor = None
+        if results:
+            if has_next:
+                self.next_cursor = self.encode_cursor(results[-1], reverse=False)
+            if has_previous:
+                self.previous_cursor = self.encode_cursor(results[0], reverse=True)
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in (
+            "1",
+            "true",
+        )
+
+    def encode_cursor(self, obj, reverse):
+        # Rows are model instances, or dicts for ``values()`` querysets.
+        if isinstance(obj, dict):
+            created_at, pk = obj["created_at"], obj["id"]
+        else:
+            created_at, pk = obj.created_at, obj.pk
+        payload = {"c": created_at.isoformat(), "i": str(pk)}
+        if reverse:
+            payload["r"] = 1
+        data = json.dumps(payload, separators=(",", ":")).encode("ascii")
+        return base64.urlsafe_b64encode(data).decode("ascii")
+
+    def decode_cursor(self, encoded):
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            created_at = parse_datetime(payload["c"])
+            pk = uuid.UUID(payload["i"])
+        except (
+            AttributeError,
+            binascii.Error,
+            KeyError,
+            TypeError,
+            ValueError,
+            UnicodeError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk, bool(payload.get("r"))
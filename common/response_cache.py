@@ -0,0 +1,161 @@
+"""
+Versioned cache for GET responses of list/detail views.
+
+A cached response is keyed by the org, the visibility scope of the caller
+(admins share one scope, everyone else gets their own), the path and the
+normalized query string, plus the current *generation* of every model the
+view reads. Generations are per-org, per-model counters kept in the shared
+cache (Redis in production); ``common.signals`` bumps them on every
+``BaseModel`` save/delete and M2M change, so a write makes all dependent
+keys unreachable at once and no stale page survives it.
+
+Models without an ``org`` of their own (attachments, comments, tags...) are
+attributed to the org of the objects they point at; when there is none,
+their org-independent ``all`` generation is bumped instead.
+"""
+import functools
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import ForeignKey
+from rest_framework import status
+from rest_framework.response import Response
+
+from common.metrics import registry
+
+RESPONSE_CACHE_ENABLED = getattr(settings, "RESPONSE_CACHE_ENABLED", False)
+RESPONSE_CACHE_TIMEOUT = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+# How long a recompute may hold the lock, and how long other requests for
+# the same key wait for it before computing the response themselves.
+RESPONSE_CACHE_LOCK_TIMEOUT = 30
+RESPONSE_CACHE_WAIT = 5
+RESPONSE_CACHE_POLL_INTERVAL = 0.05
+
+ALL_ORGS = "all"
+
+
+def generation_key(org_id, label):
+    return "gen:%s:%s" % (org_id, label)
+
+
+def bump_generation(org_id, label):
+    key = generation_key(ALL_ORGS if org_id is None else org_id, label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Seed new (or evicted) counters from the clock so they never go
+        # back to a value an older cached response was stored under.
+        cache.add(key, time.time_ns(), None)
+
+
+def get_generations(org_id, labels):
+    keys = [
+        generation_key(scope, label) for label in labels for scope in (org_id, ALL_ORGS)
+    ]
+    generations = cache.get_many(keys)
+    return [generations.get(key, 0) for key in keys]
+
+
+def instance_org_ids(instance):
+    """The orgs whose generations a write to ``instance`` must bump."""
+    return objects_org_ids(type(instance), [instance])
+
+
+def objects_org_ids(model, objs):
+    """``instance_org_ids`` of a batch of ``model`` rows, one query per FK at most."""
+    opts = model._meta
+    if opts.label == "common.Org":
+        return [obj.pk for obj in objs]
+    if hasattr(model, "org_id"):
+        return list({obj.org_id for obj in objs})
+    org_ids = set()
+    for field in opts.concrete_fields:
+        related_model = field.related_model
+        if not isinstance(field, ForeignKey) or not hasattr(related_model, "org_id"):
+            continue
+        parent_ids = {getattr(obj, field.attname) for obj in objs} - {None}
+        if parent_ids:
+            org_ids.update(
+                related_model._default_manager.filter(pk__in=parent_ids).values_list(
+                    "org_id", flat=True
+                )
+            )
+    return list(org_ids) or [None]
+
+
+def get_scope(request):
+    profile = request.profile
+    if profile.role == "ADMIN" or profile.is_admin:
+        return "admin"
+    return "profile:%s" % profile.id
+
+
+def response_cache_key(request, labels):
+    org_id = request.profile.org_id
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    generations = get_generations(org_id, labels)
+    digest = hashlib.sha256(
+        "|".join(
+            [request.path, query] + [str(generation) for generation in generations]
+        ).encode("utf-8")
+    ).hexdigest()
+    return "resp:%s:%s:%s" % (org_id, get_scope(request), digest)
+
+
+def cache_response(*labels):
+    """
+    Cache the data of successful GET responses of an ``APIView`` handler.
+
+    ``labels`` are the ``app_label.Model`` names of every model the response
+    is built from. Only one request per key recomputes a missing entry;
+    concurrent ones wait up to ``RESPONSE_CACHE_WAIT`` seconds for it.
+    """
+
+    def decorator(handler):
+        name = handler.__qualname__
+
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            if not RESPONSE_CACHE_ENABLED or getattr(request, "profile", None) is None:
+                return handler(self, request, *args, **kwargs)
+            key = response_cache_key(request, labels)
+            data = cache.get(key)
+            if data is not None:
+                registry.count_cache(name, "hit")
+                return Response(data, status=status.HTTP_200_OK)
+
+            lock_key = key + ":lock"
+            locked = cache.add(lock_key, 1, RESPONSE_CACHE_LOCK_TIMEOUT)
+            if not locked:
+                data = wait_for(key)
+                if data is not None:
+                    registry.count_cache(name, "wait_hit")
+                    return Response(data, status=status.HTTP_200_OK)
+            registry.count_cache(name, "miss")
+            try:
+                response = handler(self, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+            return response
+
+        # Read by conditional_get, which folds the same generations into its ETag.
+        wrapper.cache_labels = labels
+        return wrapper
+
+    return decorator
+
+
+def wait_for(key):
+    deadline = time.monotonic() + RESPONSE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+        data = cache.get(key)
+        if data is not None:
+            return data
+    return None
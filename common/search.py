@@ -0,0 +1,193 @@
+"""
+Full-text search over the accounts, contacts, tasks and documents of an org.
+
+Each searchable model stores a weighted ``tsvector`` in ``search_vector``
+(GIN-indexed), rebuilt by ``common.signals`` after every save. Queries are
+parsed into prefix terms (``acme:* & inc:*``) so partial words match while
+the user is still typing, and each model contributes its best ranked hits
+that the caller may see.
+"""
+import re
+from functools import reduce
+from operator import add
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Q
+
+from common.m2m import m2m_through
+from common.visibility import filter_visible
+
+SEARCH_CONFIG = getattr(settings, "SEARCH_CONFIG", "simple")
+SEARCH_RESULTS_LIMIT = 10
+SEARCH_RESULTS_MAX_LIMIT = 50
+SEARCH_MAX_TERMS = 8
+
+
+def creator_or_member(field_name):
+    """Visibility of models not tracked in ``ObjectVisibility``."""
+
+    def visible(queryset, profile):
+        through, source, target = m2m_through(queryset.model, field_name)
+        return queryset.filter(
+            Q(created_by_id=profile.user_id)
+            | Q(pk__in=through.objects.filter(**{target: profile.id}).values(source))
+        )
+
+    return visible
+
+
+def visible_documents(queryset, profile):
+    through, source, target = m2m_through(queryset.model, "shared_to")
+    return queryset.filter(
+        Q(created_by=profile)
+        | Q(
+            status="active",
+            pk__in=through.objects.filter(**{target: profile.id}).values(source),
+        )
+    )
+
+
+class SearchSpec(object):
+    """
+    How one model is searched: ``weights`` maps fields to tsvector weights,
+    ``title_fields``/``subtitle_field`` describe a hit and ``visible`` limits
+    a queryset to what a non-admin profile may see.
+    """
+
+    def __init__(self, type, label, weights, title_fields, subtitle_field, visible):
+        self.type = type
+        self.label = label
+        self.weights = weights
+        self.title_fields = title_fields
+        self.subtitle_field = subtitle_field
+        self.visible = visible
+
+    @property
+    def model(self):
+        try:
+            return apps.get_model(self.label)
+        except LookupError:
+            return None
+
+    def vector(self):
+        return reduce(
+            add,
+            [
+                SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+                for field, weight in self.weights
+            ],
+        )
+
+    def hit(self, row):
+        return {
+            "type": self.type,
+            "id": str(row["id"]),
+            "title": " ".join(
+                str(row[field]) for field in self.title_fields if row[field]
+            ),
+            "subtitle": row[self.subtitle_field] or "",
+            "rank": round(row["rank"], 6),
+        }
+
+
+SEARCH_SPECS = (
+    SearchSpec(
+        "account",
+        "accounts.Account",
+        (
+            ("name", "A"),
+            ("email", "B"),
+            ("industry", "C"),
+            ("billing_city", "C"),
+            ("description", "D"),
+        ),
+        ("name",),
+        "email",
+        filter_visible,
+    ),
+    SearchSpec(
+        "contact",
+        "contacts.Contact",
+        (
+            ("first_name", "A"),
+            ("last_name", "A"),
+            ("primary_email", "B"),
+            ("organization", "C"),
+            ("title", "C"),
+            ("description", "D"),
+        ),
+        ("first_name", "last_name"),
+        "primary_email",
+        filter_visible,
+    ),
+    SearchSpec(
+        "task",
+        "tasks.Task",
+        (("title", "A"),),
+        ("title",),
+        "status",
+        creator_or_member("assigned_to"),
+    ),
+    SearchSpec(
+        "document",
+        "common.Document",
+        (("title", "A"),),
+        ("title",),
+        "status",
+        visible_documents,
+    ),
+)
+SEARCH_SPECS_BY_LABEL = {spec.label: spec for spec in SEARCH_SPECS}
+SEARCH_TYPES = [spec.type for spec in SEARCH_SPECS]
+
+
+def update_search_vectors(model, pks=None, update_fields=None):
+    """Rebuild ``search_vector`` of ``pks`` (every row if None) in one UPDATE."""
+    spec = SEARCH_SPECS_BY_LABEL[model._meta.label]
+    if update_fields is not None and not {
+        field for field, _ in spec.weights
+    }.intersection(update_fields):
+        return
+    queryset = model._default_manager.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    queryset.update(search_vector=spec.vector())
+
+
+def parse_query(text):
+    """A prefix ``SearchQuery`` matching every word of ``text``, or None."""
+    terms = re.findall(r"[^\W_]+", text.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        return None
+    return SearchQuery(
+        " & ".join("%s:*" % term for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+
+
+def search(profile, admin, text, types=SEARCH_TYPES, limit=SEARCH_RESULTS_LIMIT):
+    """Ranked hits for ``text`` in the org of ``profile``, best first."""
+    query = parse_query(text)
+    if query is None:
+        return []
+    hits = []
+    for spec in SEARCH_SPECS:
+        model = spec.model
+        if spec.type not in types or model is None:
+            continue
+        queryset = model._default_manager.filter(
+            org_id=profile.org_id, search_vector=query
+        )
+        if not admin:
+            queryset = spec.visible(queryset, profile)
+        rows = (
+            queryset.annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at")
+            .values("id", "rank", spec.subtitle_field, *spec.title_fields)[:limit]
+        )
+        hits.extend(spec.hit(row) for row in rows)
+    hits.sort(key=lambda hit: hit["rank"], reverse=True)
+    return hits[:limit]
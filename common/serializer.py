@@ -1,8 +1,12 @@
+import datetime
+import decimal
 import re
+import uuid
 
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import check_password
 from django.contrib.auth.tokens import default_token_generator
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
 from django.utils.http import urlsafe_base64_decode
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
@@ -19,6 +23,144 @@ from common.models import (
 )
 
 
+class EagerLoadingListSerializer(serializers.ListSerializer):
+    """
+    Applies the child serializer's eager-loading plan before serializing.
+
+    Only the outermost list does it: nested lists read the related objects
+    their parent already prefetched.
+    """
+
+    def to_representation(self, data):
+        if self.parent is None:
+            data = self.child.setup_eager_loading(data)
+        return super().to_representation(data)
+
+
+class EagerLoadingMixin(object):
+    """
+    Declares the select_related/prefetch_related plan matching a serializer tree.
+
+    ``nested_serializers`` maps a related lookup to the serializer rendering it,
+    whose own plan is applied to the prefetch queryset. Set
+    ``list_serializer_class = EagerLoadingListSerializer`` in ``Meta`` so the
+    plan runs whenever the serializer is used with ``many=True``, on querysets
+    as well as on the lists returned by paginators.
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    nested_serializers = {}
+
+    @classmethod
+    def get_prefetch_lookups(cls):
+        lookups = list(cls.prefetch_related_fields)
+        for lookup, serializer_class in cls.nested_serializers.items():
+            queryset = serializer_class.Meta.model._default_manager.all()
+            lookups.append(
+                Prefetch(lookup, queryset=serializer_class.setup_eager_loading(queryset))
+            )
+        return lookups
+
+    @classmethod
+    def setup_eager_loading(cls, data):
+        if isinstance(data, QuerySet):
+            return data.select_related(*cls.select_related_fields).prefetch_related(
+                *cls.get_prefetch_lookups()
+            )
+        data = list(data)
+        prefetch_related_objects(
+            data, *cls.select_related_fields, *cls.get_prefetch_lookups()
+        )
+        return data
+
+
+class ValuesSummarySerializer(object):
+    """
+    Flat list representation read straight from ``QuerySet.values()``.
+
+    List views switch to it when the client passes ``?fields=`` and/or
+    ``?expand=``: only the requested columns are selected, no model
+    instances are built, and nested serializers only run for the relations
+    named in ``?expand=`` (one prefetch per relation for the whole page).
+    ``id`` is always returned; ``created_at`` is always selected because the
+    keyset paginator orders on it.
+    """
+
+    model = None
+    fields = ()
+    default_fields = ()
+    expandable_fields = {}
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+
+    def __init__(self, fields=None, expand=()):
+        self.selected = list(fields or self.default_fields)
+        self.expand = list(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        """Return a summary serializer for ``request``, or None if it asked for neither."""
+        params = request.query_params
+        if cls.fields_query_param not in params and cls.expand_query_param not in params:
+            return None
+        return cls(
+            fields=cls.parse_names(params, cls.fields_query_param, cls.fields),
+            expand=cls.parse_names(params, cls.expand_query_param, cls.expandable_fields),
+        )
+
+    @staticmethod
+    def parse_names(params, param, allowed):
+        names = [name.strip() for name in params.get(param, "").split(",")]
+        names = list(dict.fromkeys(name for name in names if name))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise serializers.ValidationError(
+                {param: "Unknown field(s): %s" % ", ".join(unknown)}
+            )
+        return names
+
+    def get_queryset(self, queryset):
+        return queryset.values(*dict.fromkeys(["id", "created_at"] + self.selected))
+
+    def to_representation(self, rows):
+        names = list(dict.fromkeys(["id"] + self.selected))
+        data = [{name: self.to_value(row[name]) for name in names} for row in rows]
+        ids = [row["id"] for row in rows]
+        for name in self.expand:
+            related = self.expand_relation(name, ids)
+            for item, pk in zip(data, ids):
+                item[name] = related.get(pk, [])
+        return data
+
+    def expand_relation(self, name, ids):
+        serializer_class = self.expandable_fields[name]
+        queryset = serializer_class.setup_eager_loading(
+            serializer_class.Meta.model._default_manager.all()
+        )
+        instances = (
+            self.model._default_manager.filter(pk__in=ids)
+            .only("pk")
+            .prefetch_related(Prefetch(name, queryset=queryset))
+        )
+        return {
+            instance.pk: serializer_class(
+                list(getattr(instance, name).all()), many=True
+            ).data
+            for instance in instances
+        }
+
+    @staticmethod
+    def to_value(value):
+        # Phone numbers and similar field types come back from ``values()``
+        # as objects the JSON renderer does not know about.
+        if value is None or isinstance(
+            value, (str, int, float, datetime.date, uuid.UUID, decimal.Decimal)
+        ):
+            return value
+        return str(value)
+
+
 class OrganizationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Org
@@ -183,11 +325,13 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id","email","profile_pic"]
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     # address = BillingAddressSerializer()
+    select_related_fields = ("user",)
 
     class Meta:
         model = Profile
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "user_details",
@@ -377,3 +521,28 @@ class UserUpdateStatusSwaggerSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices = STATUS_CHOICES,required=True)
 
 
+
+
+class BulkAssignSerializer(serializers.Serializer):
+    """
+    Objects picked by ``ids`` or by a ``filter`` of list-view lookups, and
+    the profiles to ``add`` to and ``remove`` from their assigned users.
+    """
+
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+    filter = serializers.DictField(child=serializers.CharField(), required=False)
+    add = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+    remove = serializers.ListField(
+        child=serializers.UUIDField(), required=False, default=list
+    )
+
+    def validate(self, data):
+        if bool(data.get("ids")) == bool(data.get("filter")):
+            raise serializers.ValidationError("Pass either ids or filter")
+        if not data["add"] and not data["remove"]:
+            raise serializers.ValidationError("Nothing to add or remove")
+        if set(data["add"]) & set(data["remove"]):
+            raise serializers.ValidationError(
+                "A profile cannot be both added and removed"
+            )
+        return data
@@ -0,0 +1,282 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from accounts.models import Account, Tags
+from common import auth_context, counters, search, visibility
+from common.base import BaseModel
+from common.lookups import invalidate_lookups
+from common.m2m import m2m_links_changed
+from common.manager import bulk_saved
+from common.models import Org, Profile, User
+from common.response_cache import bump_generation, instance_org_ids, objects_org_ids
+from contacts.models import Contact
+from teams.models import Teams
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    auth_context.invalidate_user(instance.id)
+    org_ids = list(
+        Profile.objects.filter(user_id=instance.id).values_list("org_id", flat=True)
+    )
+    invalidate_lookups(org_ids, "users", "teams")
+    # User is not a BaseModel, but its email and picture are embedded in the
+    # cached responses through the profiles; every cached view reads those.
+    for org_id in org_ids:
+        bump_generation(org_id, Profile._meta.label)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    auth_context.invalidate_profile(instance.user_id, instance.org_id)
+    # The org's API key may resolve to this profile (or should now resolve
+    # to it, if it just became an active admin).
+    auth_context.invalidate_api_keys(instance.org_id)
+    invalidate_lookups([instance.org_id], "users", "teams")
+
+
+@receiver([post_save, post_delete], sender=Org)
+def invalidate_cached_org(sender, instance, **kwargs):
+    auth_context.invalidate_org(instance.id)
+    auth_context.invalidate_api_keys(instance.id)
+
+
+@receiver([post_save, post_delete], sender=Contact)
+def invalidate_contacts_lookup(sender, instance, **kwargs):
+    invalidate_lookups([instance.org_id], "contacts")
+
+
+@receiver([post_save, post_delete], sender=Teams)
+def invalidate_teams_lookup(sender, instance, **kwargs):
+    invalidate_lookups([instance.org_id], "teams")
+
+
+@receiver(m2m_changed, sender=Teams.users.through)
+def invalidate_team_users_lookup(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith("post_"):
+        # instance is the team, or on the reverse side the profile; either
+        # way it belongs to the org whose teams changed.
+        invalidate_lookups([instance.org_id], "teams")
+
+
+def tag_org_ids(tag_id):
+    return Account.objects.filter(tags=tag_id).values_list("org_id", flat=True).distinct()
+
+
+@receiver(post_save, sender=Tags)
+def invalidate_tags_lookup(sender, instance, **kwargs):
+    invalidate_lookups(tag_org_ids(instance.id), "tags")
+
+
+@receiver(pre_delete, sender=Tags)
+def invalidate_deleted_tag_lookup(sender, instance, **kwargs):
+    # Read the orgs before the account links are cascaded away.
+    invalidate_lookups(list(tag_org_ids(instance.id)), "tags")
+
+
+@receiver(post_delete, sender=Account)
+def invalidate_account_tags_lookup(sender, instance, **kwargs):
+    invalidate_lookups([instance.org_id], "tags")
+
+
+@receiver(m2m_changed, sender=Account.tags.through)
+def invalidate_account_tag_links_lookup(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear", "pre_clear"):
+        return
+    if not reverse:
+        org_ids = [instance.org_id]
+    elif pk_set:
+        org_ids = Account.objects.filter(pk__in=pk_set).values_list("org_id", flat=True)
+    else:
+        org_ids = tag_org_ids(instance.id)
+    invalidate_lookups(org_ids, "tags")
+
+
+@receiver([post_save, post_delete])
+def bump_response_cache_generation(sender, instance, raw=False, **kwargs):
+    if raw or not isinstance(instance, BaseModel):
+        return
+    for org_id in instance_org_ids(instance):
+        bump_generation(org_id, sender._meta.label)
+
+
+@receiver(m2m_changed)
+def bump_response_cache_m2m_generation(sender, instance, action, model, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not isinstance(instance, BaseModel):
+        return
+    for org_id in instance_org_ids(instance):
+        bump_generation(org_id, instance._meta.label)
+        bump_generation(org_id, model._meta.label)
+
+
+@receiver(m2m_links_changed)
+def bump_response_cache_bulk_m2m_generation(sender, field_name, source_ids, **kwargs):
+    related_model = sender._meta.get_field(field_name).related_model
+    if hasattr(sender, "org_id"):
+        org_ids = set(
+            sender._default_manager.filter(pk__in=source_ids).values_list(
+                "org_id", flat=True
+            )
+        )
+    else:
+        org_ids = {None}
+    for org_id in org_ids:
+        bump_generation(org_id, sender._meta.label)
+        bump_generation(org_id, related_model._meta.label)
+
+
+
+# Visibility rows must be current before the dashboard counters below,
+# which recount missing rows through them.
+@receiver(post_save, sender=Account)
+@receiver(post_save, sender=Contact)
+def refresh_object_visibility(sender, instance, raw=False, **kwargs):
+    # Any save may change created_by: BaseModel.save clears it when no
+    # user is logged in.
+    if not raw:
+        visibility.refresh_visibility(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Account)
+@receiver(post_delete, sender=Contact)
+def forget_object_visibility(sender, instance, **kwargs):
+    visibility.forget_visibility(sender, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Account.assigned_to.through)
+@receiver(m2m_changed, sender=Contact.assigned_to.through)
+def refresh_member_visibility(sender, instance, action, reverse, model, pk_set, **kwargs):
+    object_model = model if reverse else type(instance)
+    if action == "pre_clear":
+        visibility.members_changing(object_model, instance, action, reverse)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        visibility.members_changed(object_model, instance, action, reverse, pk_set)
+
+
+@receiver(m2m_links_changed)
+def refresh_bulk_member_visibility(sender, field_name, source_ids, **kwargs):
+    if sender in visibility.VISIBLE_MODELS and field_name == visibility.MEMBER_FIELD:
+        visibility.refresh_visibility(sender, source_ids)
+
+
+@receiver(post_init, sender=Account)
+@receiver(post_init, sender=Contact)
+def remember_dashboard_loaded_state(sender, instance, **kwargs):
+    counters.object_loaded(counters.COUNTERS_BY_MODEL[sender], instance)
+
+
+@receiver(pre_save, sender=Account)
+@receiver(pre_save, sender=Contact)
+def remember_dashboard_counted_state(
+    sender, instance, raw=False, update_fields=None, **kwargs
+):
+    if not raw:
+        counters.object_saving(counters.COUNTERS_BY_MODEL[sender], instance, update_fields)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_save, sender=Contact)
+def update_dashboard_counters(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        counters.object_saved(counters.COUNTERS_BY_MODEL[sender], instance, created)
+
+
+@receiver(pre_delete, sender=Account)
+@receiver(pre_delete, sender=Contact)
+def remember_dashboard_deleted_state(sender, instance, **kwargs):
+    counters.object_deleting(counters.COUNTERS_BY_MODEL[sender], instance)
+
+
+@receiver(post_delete, sender=Account)
+@receiver(post_delete, sender=Contact)
+def update_dashboard_counters_on_delete(sender, instance, **kwargs):
+    counters.object_deleted(counters.COUNTERS_BY_MODEL[sender], instance)
+
+
+@receiver(m2m_changed, sender=Account.assigned_to.through)
+@receiver(m2m_changed, sender=Contact.assigned_to.through)
+def update_dashboard_member_counters(sender, instance, action, reverse, model, pk_set, **kwargs):
+    spec = counters.COUNTERS_BY_MODEL[model if reverse else type(instance)]
+    if action in ("pre_remove", "pre_clear"):
+        counters.members_changing(spec, instance, action, reverse, pk_set)
+    elif action in ("post_add", "post_remove", "post_clear"):
+        counters.members_changed(spec, instance, action, reverse, pk_set)
+
+
+@receiver(m2m_links_changed)
+def reset_dashboard_member_counters(sender, field_name, source_ids, **kwargs):
+    spec = counters.COUNTERS_BY_MODEL.get(sender)
+    if spec is None or field_name != spec.member_field:
+        return
+    org_ids = set(
+        sender._default_manager.filter(pk__in=source_ids).values_list("org_id", flat=True)
+    )
+    for org_id in org_ids - {None}:
+        counters.reset_profile_counters(org_id, [spec])
+
+
+@receiver(post_save)
+def update_search_vector(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or sender._meta.label not in search.SEARCH_SPECS_BY_LABEL:
+        return
+    search.update_search_vectors(sender, [instance.pk], update_fields)
+
+
+# bulk_create/bulk_update bypass the per-instance receivers above;
+# BaseQuerySet sends bulk_saved once per batch instead.
+@receiver(bulk_saved)
+def bump_response_cache_bulk_generation(sender, objs, **kwargs):
+    if not issubclass(sender, BaseModel):
+        return
+    for org_id in objects_org_ids(sender, objs):
+        bump_generation(org_id, sender._meta.label)
+
+
+@receiver(bulk_saved, sender=Profile)
+def invalidate_bulk_saved_profiles(sender, objs, **kwargs):
+    for profile in objs:
+        auth_context.invalidate_profile(profile.user_id, profile.org_id)
+    org_ids = {profile.org_id for profile in objs}
+    for org_id in org_ids:
+        auth_context.invalidate_api_keys(org_id)
+    invalidate_lookups(org_ids, "users", "teams")
+
+
+@receiver(bulk_saved, sender=Contact)
+def invalidate_bulk_saved_contacts_lookup(sender, objs, **kwargs):
+    invalidate_lookups({contact.org_id for contact in objs}, "contacts")
+
+
+@receiver(bulk_saved, sender=Teams)
+def invalidate_bulk_saved_teams_lookup(sender, objs, **kwargs):
+    invalidate_lookups({team.org_id for team in objs}, "teams")
+
+
+@receiver(bulk_saved, sender=Account)
+@receiver(bulk_saved, sender=Contact)
+def refresh_bulk_saved_visibility(sender, objs, created, update_fields, **kwargs):
+    if created or "created_by" in update_fields:
+        visibility.refresh_visibility(sender, [obj.pk for obj in objs])
+    spec = counters.COUNTERS_BY_MODEL[sender]
+    if update_fields is not None:
+        attnames = {sender._meta.get_field(name).attname for name in update_fields}
+        if not attnames.intersection(spec.fields):
+            return
+    # Recount rather than apply per-row deltas: one COUNT per org.
+    for org_id in {obj.org_id for obj in objs} - {None}:
+        counters.rebuild_org_counters(org_id, [spec])
+
+
+@receiver(bulk_saved)
+def update_bulk_search_vectors(sender, objs, update_fields, **kwargs):
+    if sender._meta.label in search.SEARCH_SPECS_BY_LABEL:
+        search.update_search_vectors(sender, [obj.pk for obj in objs], update_fields)
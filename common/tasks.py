@@ -1,6 +1,7 @@
 import datetime
 
 from celery import Celery
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import EmailMessage
@@ -9,11 +10,15 @@ from django.utils import timezone
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
-from common.models import Comment, Profile, User
+from common.counters import rebuild_org_counters
+from common.models import Comment, Org, Profile, User
 from common.token_generator import account_activation_token
 
 app = Celery("redis://")
 
+# Objects listed by name in an assignment digest; the rest are counted.
+ASSIGNMENT_DIGEST_LIMIT = 20
+
 
 @app.task
 def send_email_to_new_user(user_id):
@@ -269,3 +274,57 @@ def send_email_to_reset_password(user_email):
         )
         msg.content_subtype = "html"
         msg.send()
+
+
+@app.task
+def rebuild_dashboard_counters(org_id=None):
+    """Recount the dashboard counters of one org, or of every org"""
+    orgs = Org.objects.all()
+    if org_id:
+        orgs = orgs.filter(id=org_id)
+    for org_id in orgs.values_list("id", flat=True).iterator():
+        rebuild_org_counters(org_id)
+
+
+@app.task
+def send_assignment_digest(
+    profile_id,
+    model_label,
+    added_ids,
+    added_count,
+    removed_ids,
+    removed_count,
+    assigned_by_id=None,
+):
+    """
+    Send one mail listing the objects a bulk assignment gave to or took from a user.
+    ``added_ids``/``removed_ids`` are the first objects of each kind, the
+    counts are the totals.
+    """
+    profile = (
+        Profile.objects.filter(id=profile_id, is_active=True)
+        .select_related("user")
+        .first()
+    )
+    if profile is None:
+        return
+    model = apps.get_model(model_label)
+    context = {}
+    context["url"] = settings.DOMAIN_NAME
+    context["user"] = profile.user
+    context["assigned_by"] = User.objects.filter(id=assigned_by_id).first()
+    context["object_name"] = model._meta.verbose_name_plural.lower()
+    for name, ids, count in (
+        ("added", added_ids, added_count),
+        ("removed", removed_ids, removed_count),
+    ):
+        context[name] = model.objects.filter(id__in=ids[:ASSIGNMENT_DIGEST_LIMIT])
+        context[name + "_count"] = count
+        context[name + "_more"] = max(0, count - ASSIGNMENT_DIGEST_LIMIT)
+    subject = "Your assigned %s were updated." % context["object_name"]
+    html_content = render_to_string(
+        "assigned_to/assignment_digest.html", context=context
+    )
+    msg = EmailMessage(subject, html_content, to=[profile.user.email])
+    msg.content_subtype = "html"
+    msg.send()
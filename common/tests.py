@@ -0,0 +1,161 @@
+import base64
+import json
+import uuid
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import Tags
+from common import auth_context
+from common.manager import bulk_saved
+from common.metrics import RequestMetrics, current_metrics
+from common.models import Org, Profile, User
+from common.pagination import KeysetPagination
+from common.response_cache import get_generations
+
+
+class AuthContextTest(TestCase):
+    def setUp(self):
+        auth_context._local_cache.clear()
+        auth_context._api_key_cache.clear()
+        cache.clear()
+        self.org = Org.objects.create(name="org")
+        self.user = User.objects.create(email="user@example.com")
+        self.user.set_password("secret")
+        self.user.save()
+        self.profile = Profile.objects.create(user=self.user, org=self.org)
+        self.refresh = RefreshToken.for_user(self.user)
+
+    def resolve(self, token, org=None):
+        headers = {"HTTP_AUTHORIZATION": "Bearer %s" % token}
+        if org:
+            headers["HTTP_ORG"] = str(org.id)
+        return auth_context.get_auth_context(RequestFactory().get("/", **headers))
+
+    def test_access_token_resolves_profile(self):
+        context = self.resolve(self.refresh.access_token, self.org)
+        self.assertEqual(context.profile, self.profile)
+        self.assertEqual(context.user, self.user)
+
+    def test_refresh_token_is_refused(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.resolve(self.refresh)
+        with self.assertRaises(AuthenticationFailed):
+            self.resolve(self.refresh, self.org)
+
+    def test_inactive_user_is_refused(self):
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.resolve(self.refresh.access_token)
+
+    def test_caches_values_without_password(self):
+        first = self.resolve(self.refresh.access_token, self.org)
+        second = self.resolve(self.refresh.access_token, self.org)
+        self.assertIsNot(first.profile, second.profile)
+        self.assertIsNot(first.user, second.user)
+        cached = cache.get(auth_context.profile_cache_key(self.user.id, self.org.id))
+        self.assertNotIn("password", cached["user"])
+        self.assertTrue(second.user.check_password("secret"))
+
+
+    def test_api_key_resolutions_follow_changes(self):
+        self.org.api_key = "old-key"
+        self.org.save()
+        self.profile.role = "ADMIN"
+        self.profile.save()
+        self.assertEqual(
+            auth_context.resolve_api_key("old-key"), (self.org.id, self.user.id)
+        )
+        # Another worker's in-process entry is keyed on the old version.
+        stale = auth_context.api_key_cache_key("old-key", auth_context.api_keys_version())
+        self.org.api_key = "new-key"
+        self.org.save()
+        auth_context._api_key_cache.set(stale, (self.org.id, self.user.id))
+        with self.assertRaises(AuthenticationFailed):
+            auth_context.resolve_api_key("old-key")
+        self.assertEqual(
+            auth_context.resolve_api_key("new-key"), (self.org.id, self.user.id)
+        )
+        self.profile.role = "USER"
+        self.profile.save()
+        with self.assertRaises(AuthenticationFailed):
+            auth_context.resolve_api_key("new-key")
+
+
+class MetricsTest(TestCase):
+    def test_metrics_are_off_without_a_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_need_the_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"crm_serializer_seconds_total", response.content)
+
+    def test_serializer_data_is_timed_once(self):
+        class NameSerializer(serializers.Serializer):
+            name = serializers.SerializerMethodField()
+
+            def get_name(self, obj):
+                return serializers.CharField().to_representation(obj["name"])
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            NameSerializer([{"name": "a"}, {"name": "b"}], many=True).data
+        finally:
+            current_metrics.reset(token)
+        self.assertGreater(metrics.serialize_seconds, 0)
+        self.assertFalse(metrics._serializing)
+
+
+class ResponseCacheGenerationTest(TestCase):
+    def test_user_change_bumps_profile_generation(self):
+        cache.clear()
+        org = Org.objects.create(name="org")
+        user = User.objects.create(email="user@example.com")
+        Profile.objects.create(user=user, org=org)
+        before = get_generations(org.id, ["common.Profile"])
+        user.email = "renamed@example.com"
+        user.save()
+        self.assertNotEqual(get_generations(org.id, ["common.Profile"]), before)
+
+
+class KeysetPaginationTest(TestCase):
+    def encode(self, payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def test_cursor_id_must_be_a_uuid(self):
+        pagination = KeysetPagination()
+        created_at = "2024-01-01T00:00:00+00:00"
+        for pk in ("x", 1, None):
+            with self.assertRaises(NotFound):
+                pagination.decode_cursor(self.encode({"c": created_at, "i": pk}))
+        pk = uuid.uuid4()
+        _, decoded, _ = pagination.decode_cursor(
+            self.encode({"c": created_at, "i": str(pk)})
+        )
+        self.assertEqual(decoded, pk)
+
+
+class BulkSavedTest(TestCase):
+    def test_skipped_conflicts_are_not_sent(self):
+        Tags.objects.create(name="red")
+        sent = []
+
+        def receiver(sender, objs, **kwargs):
+            sent.extend(obj.slug for obj in objs)
+
+        bulk_saved.connect(receiver, sender=Tags)
+        try:
+            Tags.objects.bulk_create(
+                [Tags(name="red", slug="red"), Tags(name="blue", slug="blue")],
+                ignore_conflicts=True,
+            )
+        finally:
+            bulk_saved.disconnect(receiver, sender=Tags)
+        self.assertEqual(sent, ["blue"])
@@ -0,0 +1,278 @@
+import hashlib
+import os
+import unittest
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+
+from accounts.models import Account
+from common.explain import explain, index_names, seq_scanned_tables
+from common.models import Address, Document, Org, Profile, User
+from contacts.models import Contact
+from teams.models import Teams
+
+# Seeding is slow, so the plan tests only run when asked to, e.g.
+# QUERY_PLAN_ROWS=1000000 python manage.py test common.tests_query_plans
+QUERY_PLAN_ROWS = int(os.getenv("QUERY_PLAN_ROWS", "0"))
+
+
+def random_text(prefix):
+    """SQL text expression unique per generated row ``g``."""
+    return "'%s' || md5(g::text)" % prefix
+
+
+def one_of(values):
+    """SQL expression cycling through ``values`` as ``g`` grows."""
+    return "('{%s}'::uuid[])[1 + mod(g, %d)]" % (
+        ",".join(str(value) for value in values),
+        len(values),
+    )
+
+
+def clone_rows(instance, count, varied):
+    """
+    Insert ``count`` copies of ``instance`` in one statement, with new
+    primary keys and ``varied`` columns (attname -> SQL expression of the
+    series value ``g``), then ANALYZE the table.
+    """
+    opts = instance._meta
+    quote = connection.ops.quote_name
+    columns, values = [], []
+    for field in opts.concrete_fields:
+        columns.append(quote(field.column))
+        if field.primary_key:
+            values.append("gen_random_uuid()")
+        elif field.attname in varied:
+            values.append(varied[field.attname])
+        else:
+            values.append("t.%s" % quote(field.column))
+    table = quote(opts.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO %s (%s) SELECT %s FROM %s t, generate_series(1, %%s) g "
+            "WHERE t.%s = %%s"
+            % (table, ", ".join(columns), ", ".join(values), table, quote(opts.pk.column)),
+            [count, instance.pk],
+        )
+        cursor.execute("ANALYZE %s" % table)
+
+
+@unittest.skipUnless(QUERY_PLAN_ROWS, "set QUERY_PLAN_ROWS to seed and run the plan tests")
+class TrigramFilterPlansTest(TestCase):
+    """The icontains filters of the list views are served by trigram indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Org.objects.create(name="org")
+        # A substring of a single seeded value, like a user's search term.
+        cls.term = hashlib.md5(b"424242").hexdigest()[4:10]
+        clone_rows(
+            Account.objects.create(
+                name="account", email="a@example.com", contact_name="c", org=cls.org
+            ),
+            QUERY_PLAN_ROWS,
+            {
+                "name": random_text("account "),
+                "billing_city": random_text("city "),
+                "industry": random_text("industry "),
+            },
+        )
+        clone_rows(
+            Contact.objects.create(
+                first_name="contact",
+                last_name="last",
+                primary_email="c@example.com",
+                mobile_number="+14155550000",
+                org=cls.org,
+            ),
+            QUERY_PLAN_ROWS,
+            {
+                "first_name": random_text("contact "),
+                "primary_email": random_text("") + " || '@example.com'",
+                "mobile_number": "'+1' || lpad(g::text, 10, '0')",
+            },
+        )
+        clone_rows(
+            Address.objects.create(city="city"),
+            QUERY_PLAN_ROWS,
+            {"city": random_text("city ")},
+        )
+        clone_rows(
+            Teams.objects.create(name="team", description="team", org=cls.org),
+            QUERY_PLAN_ROWS,
+            {"name": random_text("team ")},
+        )
+        clone_rows(
+            User.objects.create(email="user@example.com"),
+            QUERY_PLAN_ROWS,
+            {"email": random_text("") + " || '@example.com'"},
+        )
+        clone_rows(
+            Document.objects.create(title="document", org=cls.org),
+            QUERY_PLAN_ROWS,
+            {"title": random_text("document ")},
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = explain(queryset)
+        self.assertIn(index_name, index_names(plan), plan)
+        self.assertNotIn(queryset.model._meta.db_table, seq_scanned_tables(plan), plan)
+
+    def test_account_filters(self):
+        accounts = Account.objects.filter(org=self.org)
+        self.assertUsesIndex(accounts.filter(name__icontains=self.term), "account_name_trgm")
+        self.assertUsesIndex(
+            accounts.filter(billing_city__icontains=self.term), "account_billing_city_trgm"
+        )
+        self.assertUsesIndex(
+            accounts.filter(industry__icontains=self.term), "account_industry_trgm"
+        )
+
+    def test_contact_filters(self):
+        contacts = Contact.objects.filter(org=self.org)
+        self.assertUsesIndex(
+            contacts.filter(first_name__icontains=self.term), "contact_first_name_trgm"
+        )
+        self.assertUsesIndex(
+            contacts.filter(primary_email__icontains=self.term), "contact_primary_email_trgm"
+        )
+        self.assertUsesIndex(
+            contacts.filter(mobile_number__icontains="0424242"), "contact_mobile_number_trgm"
+        )
+        self.assertUsesIndex(
+            Address.objects.filter(city__icontains=self.term), "address_city_trgm"
+        )
+
+    def test_team_user_and_document_filters(self):
+        self.assertUsesIndex(
+            Teams.objects.filter(org=self.org, name__icontains=self.term), "teams_name_trgm"
+        )
+        self.assertUsesIndex(User.objects.filter(email__icontains=self.term), "users_email_trgm")
+        self.assertUsesIndex(
+            Document.objects.filter(org=self.org, title__icontains=self.term),
+            "document_title_trgm",
+        )
+
+    @unittest.skipUnless(apps.is_installed("tasks"), "the tasks app is not installed")
+    def test_task_filters(self):
+        Task = apps.get_model("tasks", "Task")
+        clone_rows(
+            Task.objects.create(title="task", status="New", priority="Low", org=self.org),
+            QUERY_PLAN_ROWS,
+            {"title": random_text("task ")},
+        )
+        self.assertUsesIndex(
+            Task.objects.filter(org=self.org, title__icontains=self.term), "task_title_trgm"
+        )
+
+
+@unittest.skipUnless(QUERY_PLAN_ROWS, "set QUERY_PLAN_ROWS to seed and run the plan tests")
+class OrgIndexPlansTest(TestCase):
+    """List pages and duplicate-name validators are served by the composite org indexes."""
+
+    ORG_COUNT = 100
+    PAGE_SIZE = 11
+
+    @classmethod
+    def setUpTestData(cls):
+        orgs = [Org.objects.create(name="org%d" % i) for i in range(cls.ORG_COUNT)]
+        cls.org = orgs[0]
+        org_ids = [org.id for org in orgs]
+        spread = {
+            "org_id": one_of(org_ids),
+            "created_at": "now() - g * interval '1 second'",
+        }
+        clone_rows(
+            Account.objects.create(
+                name="account", email="a@example.com", contact_name="c", org=cls.org
+            ),
+            QUERY_PLAN_ROWS,
+            dict(
+                spread,
+                name=random_text("account "),
+                status="CASE WHEN mod(g, 2) = 0 THEN 'open' ELSE 'close' END",
+            ),
+        )
+        clone_rows(
+            Contact.objects.create(
+                first_name="contact",
+                last_name="last",
+                primary_email="c@example.com",
+                org=cls.org,
+            ),
+            QUERY_PLAN_ROWS,
+            dict(
+                spread,
+                first_name=random_text("contact "),
+                primary_email=random_text("") + " || '@example.com'",
+            ),
+        )
+        clone_rows(
+            Teams.objects.create(name="team", description="team", org=cls.org),
+            QUERY_PLAN_ROWS,
+            dict(spread, name=random_text("team ")),
+        )
+        clone_rows(
+            Document.objects.create(title="document", org=cls.org),
+            QUERY_PLAN_ROWS,
+            dict(
+                spread,
+                title=random_text("document "),
+                status="CASE WHEN mod(g, 2) = 0 THEN 'active' ELSE 'inactive' END",
+            ),
+        )
+        user = User.objects.create(email="template@example.com")
+        clone_rows(user, QUERY_PLAN_ROWS, {"email": "'seed' || g || '@example.com'"})
+        clone_rows(
+            Profile.objects.create(user=user, org=cls.org),
+            QUERY_PLAN_ROWS,
+            dict(
+                spread,
+                user_id="(SELECT id FROM users WHERE email = 'seed' || g || '@example.com')",
+                is_active="mod(g, 10) > 0",
+            ),
+        )
+
+    def page(self, queryset):
+        return queryset.order_by("-created_at", "-id")[: self.PAGE_SIZE]
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = explain(queryset)
+        self.assertIn(index_name, index_names(plan), plan)
+
+    def test_list_pages(self):
+        self.assertUsesIndex(
+            self.page(Account.objects.filter(org=self.org, status="open")),
+            "account_org_status_created",
+        )
+        self.assertUsesIndex(
+            self.page(Contact.objects.filter(org=self.org)), "contact_org_created"
+        )
+        self.assertUsesIndex(self.page(Teams.objects.filter(org=self.org)), "teams_org_created")
+        self.assertUsesIndex(
+            self.page(Document.objects.filter(org=self.org, status="active")),
+            "document_org_status_created",
+        )
+        self.assertUsesIndex(
+            self.page(Profile.objects.filter(org=self.org, is_active=True)),
+            "profile_org_active_created",
+        )
+
+    def test_duplicate_name_validators(self):
+        self.assertUsesIndex(
+            Account.objects.filter(name__iexact="Acme", org=self.org),
+            "account_org_upper_name",
+        )
+        self.assertUsesIndex(
+            Contact.objects.filter(first_name__iexact="Ada", org=self.org),
+            "contact_org_upper_first_name",
+        )
+        self.assertUsesIndex(
+            Teams.objects.filter(name__iexact="Sales", org=self.org),
+            "teams_org_upper_name",
+        )
+        self.assertUsesIndex(
+            Document.objects.filter(title__iexact="Contract", org=self.org),
+            "document_org_upper_title",
+        )
@@ -0,0 +1,65 @@
+import io
+import os
+import time
+import unittest
+import uuid
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from common.base import uuid7
+
+# Run with e.g. UUID_BENCHMARK_ROWS=5000000 python manage.py test
+# common.tests_uuid_benchmark; results are printed and the v7 key index is
+# checked to be no larger than the uuid4 one.
+UUID_BENCHMARK_ROWS = int(os.getenv("UUID_BENCHMARK_ROWS", "0"))
+BATCH_SIZE = 100_000
+
+
+def load_contacts(table, new_id, rows):
+    """COPY ``rows`` contact-shaped rows keyed by ``new_id()``; returns seconds spent."""
+    org_id = uuid.uuid4()
+    created_at = timezone.now().isoformat()
+    elapsed = 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE %s (id uuid PRIMARY KEY, org_id uuid NOT NULL, "
+            "first_name varchar(255) NOT NULL, created_at timestamptz NOT NULL)" % table
+        )
+        for start in range(0, rows, BATCH_SIZE):
+            buffer = io.StringIO(
+                "".join(
+                    "%s\t%s\tcontact %d\t%s\n" % (new_id(), org_id, number, created_at)
+                    for number in range(start, min(start + BATCH_SIZE, rows))
+                )
+            )
+            began = time.perf_counter()
+            cursor.copy_expert(
+                "COPY %s (id, org_id, first_name, created_at) FROM STDIN" % table, buffer
+            )
+            elapsed += time.perf_counter() - began
+        cursor.execute("SELECT pg_relation_size(%s)", ["%s_pkey" % table])
+        index_bytes = cursor.fetchone()[0]
+    return elapsed, index_bytes
+
+
+@unittest.skipUnless(UUID_BENCHMARK_ROWS, "set UUID_BENCHMARK_ROWS to run the benchmark")
+class UUIDKeyBenchmarkTest(TestCase):
+    def test_uuid7_keys_insert_faster_into_a_smaller_index(self):
+        results = {
+            "uuid4": load_contacts("bench_contacts_uuid4", uuid.uuid4, UUID_BENCHMARK_ROWS),
+            "uuid7": load_contacts("bench_contacts_uuid7", uuid7, UUID_BENCHMARK_ROWS),
+        }
+        for name, (seconds, index_bytes) in results.items():
+            print(
+                "%s: %d rows in %.1fs (%.0f rows/s), primary key index %.1f MiB"
+                % (
+                    name,
+                    UUID_BENCHMARK_ROWS,
+                    seconds,
+                    UUID_BENCHMARK_ROWS / seconds,
+                    index_bytes / 1024 / 1024,
+                )
+            )
+        self.assertLessEqual(results["uuid7"][1], results["uuid4"][1])
@@ -8,6 +8,9 @@ app_name = "api_common"
 
 urlpatterns = [
     path("dashboard/", views.ApiHomeView.as_view()),
+    path("meta/", views.MetaView.as_view()),
+    path("lookups/<str:name>/", views.OrgLookupView.as_view()),
+    path("search/", views.SearchView.as_view()),
     path(
         "auth/refresh-token/",
         jwt_views.TokenRefreshView.as_view(),
@@ -13,11 +13,12 @@ from django.contrib.auth import authenticate, login
 from django.contrib.auth.hashers import make_password
 from django.db import transaction
 from django.db.models import Q
+from django.http import Http404, HttpResponse
 from django.http.response import JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
 from django.utils.encoding import force_str
-from django.utils.http import urlsafe_base64_decode
+from django.utils.http import parse_etags, urlsafe_base64_decode
 from django.utils.translation import gettext as _
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
@@ -27,7 +28,6 @@ from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schem
 #from common.external_auth import CustomDualAuthentication
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -37,7 +37,19 @@ from accounts.serializer import AccountSerializer
 
 ##from common.custom_auth import JSONWebTokenAuthentication
 from common import serializer, swagger_params1
+from common.choices import get_choices_payload, wants_choices
+from common.counters import COUNTERS_BY_MODEL, DASHBOARD_RECENT_LIMIT, get_counters
+from common.lookups import LOOKUPS, get_lookup
+from common.m2m import sync_m2m
+from common.metrics import registry
 from common.models import APISettings, Document, Org, Profile, User
+from common.pagination import KeysetPagination
+from common.search import (
+    SEARCH_RESULTS_LIMIT,
+    SEARCH_RESULTS_MAX_LIMIT,
+    SEARCH_TYPES,
+    search,
+)
 from common.serializer import *
 # from common.serializer import (
 #     CreateUserSerializer,
@@ -79,7 +91,7 @@ class GetTeamsAndUsersView(APIView):
         return Response(data)
 
 
-class UsersListView(APIView, LimitOffsetPagination):
+class UsersListView(APIView, KeysetPagination):
 
     permission_classes = (IsAuthenticated,)
     @extend_schema(parameters=swagger_params1.organization_params,request=UserCreateSwaggerSerializer)
@@ -143,7 +155,7 @@ class UsersListView(APIView, LimitOffsetPagination):
                 {"error": True, "errors": "Permission Denied"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        queryset = Profile.objects.filter(org=request.profile.org).order_by("-id")
+        queryset = Profile.objects.filter(org=request.profile.org)
         params = request.query_params
         if params:
             if params.get("email"):
@@ -156,40 +168,32 @@ class UsersListView(APIView, LimitOffsetPagination):
         context = {}
         queryset_active_users = queryset.filter(is_active=True)
         results_active_users = self.paginate_queryset(
-            queryset_active_users.distinct(), self.request, view=self
+            queryset_active_users.distinct(),
+            self.request,
+            view=self,
+            cursor_query_param="active_cursor",
         )
         active_users = ProfileSerializer(results_active_users, many=True).data
-        if results_active_users:
-            offset = queryset_active_users.filter(
-                id__gte=results_active_users[-1].id
-            ).count()
-            if offset == queryset_active_users.count():
-                offset = None
-        else:
-            offset = 0
         context["active_users"] = {
             "active_users_count": self.count,
             "active_users": active_users,
-            "offset": offset,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
         }
 
         queryset_inactive_users = queryset.filter(is_active=False)
         results_inactive_users = self.paginate_queryset(
-            queryset_inactive_users.distinct(), self.request, view=self
+            queryset_inactive_users.distinct(),
+            self.request,
+            view=self,
+            cursor_query_param="inactive_cursor",
         )
         inactive_users = ProfileSerializer(results_inactive_users, many=True).data
-        if results_inactive_users:
-            offset = queryset_inactive_users.filter(
-                id__gte=results_inactive_users[-1].id
-            ).count()
-            if offset == queryset_inactive_users.count():
-                offset = None
-        else:
-            offset = 0
         context["inactive_users"] = {
             "inactive_users_count": self.count,
             "inactive_users": inactive_users,
-            "offset": offset,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
         }
 
         context["admin_email"] = settings.ADMIN_EMAIL
@@ -238,7 +242,8 @@ class UserDetailView(APIView):
         context["assigned_data"] = assigned_data
         comments = profile_obj.user_comments.all()
         context["comments"] = CommentSerializer(comments, many=True).data
-        context["countries"] = COUNTRIES
+        if wants_choices(self.request):
+            context["countries"] = COUNTRIES
         return Response(
             {"error": False, "data": context},
             status=status.HTTP_200_OK,
@@ -329,36 +334,23 @@ class ApiHomeView(APIView):
 
     @extend_schema(parameters=swagger_params1.organization_params)
     def get(self, request, format=None):
-        accounts = Account.objects.filter(status="open", org=request.profile.org)
-        contacts = Contact.objects.filter(org=request.profile.org)
-        leads = Lead.objects.filter(org=request.profile.org).exclude(
-            Q(status="converted") | Q(status="closed")
-        )
-        opportunities = Opportunity.objects.filter(org=request.profile.org)
+        profile = request.profile
+        admin = profile.role == "ADMIN" or profile.is_admin
+        profile_id = None if admin else profile.id
+        specs = COUNTERS_BY_MODEL
+        counts = get_counters(profile, admin)
+        accounts = specs[Account].queryset(profile.org_id, profile_id)
+        contacts = specs[Contact].queryset(profile.org_id, profile_id)
 
-        if self.request.profile.role != "ADMIN" and not self.request.user.is_superuser:
-            accounts = accounts.filter(
-                Q(assigned_to=self.request.profile) | Q(created_by=self.request.profile.user)
-            )
-            contacts = contacts.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
-            )
-            leads = leads.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
-            ).exclude(status="closed")
-            opportunities = opportunities.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
-            )
         context = {}
-        context["accounts_count"] = accounts.count()
-        context["contacts_count"] = contacts.count()
-        context["leads_count"] = leads.count()
-        context["opportunities_count"] = opportunities.count()
-        context["accounts"] = AccountSerializer(accounts, many=True).data
-        context["contacts"] = ContactSerializer(contacts, many=True).data
+        context["accounts_count"] = counts["accounts"]
+        context["contacts_count"] = counts["contacts"]
+        context["accounts"] = AccountSerializer(
+            accounts.order_by("-created_at")[:DASHBOARD_RECENT_LIMIT], many=True
+        ).data
+        context["contacts"] = ContactSerializer(
+            contacts.order_by("-created_at")[:DASHBOARD_RECENT_LIMIT], many=True
+        ).data
 
         return Response(context, status=status.HTTP_200_OK)
 
@@ -435,14 +427,14 @@ class ProfileView(APIView):
         context["user_obj"] = ProfileSerializer(self.request.profile).data
         return Response(context, status=status.HTTP_200_OK)
 
-class DocumentListView(APIView, LimitOffsetPagination):
+class DocumentListView(APIView, KeysetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Document
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if self.request.user.is_superuser or self.request.profile.role == "ADMIN":
             queryset = queryset
         else:
@@ -486,42 +478,34 @@ class DocumentListView(APIView, LimitOffsetPagination):
 
         queryset_documents_active = queryset.filter(status="active")
         results_documents_active = self.paginate_queryset(
-            queryset_documents_active.distinct(), self.request, view=self
+            queryset_documents_active.distinct(),
+            self.request,
+            view=self,
+            cursor_query_param="active_cursor",
         )
         documents_active = DocumentSerializer(results_documents_active, many=True).data
-        if results_documents_active:
-            offset = queryset_documents_active.filter(
-                id__gte=results_documents_active[-1].id
-            ).count()
-            if offset == queryset_documents_active.count():
-                offset = None
-        else:
-            offset = 0
         context["documents_active"] = {
             "documents_active_count": self.count,
             "documents_active": documents_active,
-            "offset": offset,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
         }
 
         queryset_documents_inactive = queryset.filter(status="inactive")
         results_documents_inactive = self.paginate_queryset(
-            queryset_documents_inactive.distinct(), self.request, view=self
+            queryset_documents_inactive.distinct(),
+            self.request,
+            view=self,
+            cursor_query_param="inactive_cursor",
         )
         documents_inactive = DocumentSerializer(
             results_documents_inactive, many=True
         ).data
-        if results_documents_inactive:
-            offset = queryset_documents_inactive.filter(
-                id__gte=results_documents_active[-1].id
-            ).count()
-            if offset == queryset_documents_inactive.count():
-                offset = None
-        else:
-            offset = 0
         context["documents_inactive"] = {
             "documents_inactive_count": self.count,
             "documents_inactive": documents_inactive,
-            "offset": offset,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
         }
 
         context["users"] = ProfileSerializer(profiles, many=True).data
@@ -690,21 +674,21 @@ class DocumentDetailView(APIView):
                 status=params.get("status"),
                 org=request.profile.org,
             )
-            doc.shared_to.clear()
+            profile_ids = []
             if params.get("shared_to"):
                 assinged_to_list = params.get("shared_to")
-                profiles = Profile.objects.filter(
+                profile_ids = Profile.objects.filter(
                     id__in=assinged_to_list, org=request.profile.org, is_active=True
-                )
-                if profiles:
-                    doc.shared_to.add(*profiles)
+                ).values_list("id", flat=True)
+            sync_m2m(doc, "shared_to", profile_ids)
 
-            doc.teams.clear()
+            team_ids = []
             if params.get("teams"):
                 teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                if teams:
-                    doc.teams.add(*teams)
+                team_ids = Teams.objects.filter(
+                    id__in=teams_list, org=request.profile.org
+                ).values_list("id", flat=True)
+            sync_m2m(doc, "teams", team_ids)
             return Response(
                 {"error": False, "message": "Document Updated Successfully"},
                 status=status.HTTP_200_OK,
@@ -790,12 +774,9 @@ class DomainList(APIView):
         if serializer.is_valid():
             settings_obj = serializer.save(created_by=request.profile.user, org=request.profile.org)
             if params.get("tags"):
-                tags = params.get("tags")
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(name=tag).first()
-                    if not tag_obj:
-                        tag_obj = Tags.objects.create(name=tag)
-                    settings_obj.tags.add(tag_obj)
+                tag_ids = Tags.objects.resolve_ids(params.get("tags"))
+                if tag_ids:
+                    settings_obj.tags.add(*tag_ids)
             if assign_to_list:
                 settings_obj.lead_assigned_to.add(*assign_to_list)
             return Response(
@@ -835,17 +816,11 @@ class DomainDetailView(APIView):
         serializer = APISettingsSerializer(data=params, instance=api_setting)
         if serializer.is_valid():
             api_setting = serializer.save()
-            api_setting.tags.clear()
-            api_setting.lead_assigned_to.clear()
+            tag_ids = []
             if params.get("tags"):
-                tags = params.get("tags")
-                for tag in tags:
-                    tag_obj = Tags.objects.filter(name=tag).first()
-                    if not tag_obj:
-                        tag_obj = Tags.objects.create(name=tag)
-                    api_setting.tags.add(tag_obj)
-            if assign_to_list:
-                api_setting.lead_assigned_to.add(*assign_to_list)
+                tag_ids = Tags.objects.resolve_ids(params.get("tags"))
+            sync_m2m(api_setting, "tags", tag_ids)
+            sync_m2m(api_setting, "lead_assigned_to", assign_to_list)
             return Response(
                 {"error": False, "message": "API setting Updated sucessfully"},
                 status=status.HTTP_200_OK,
@@ -867,6 +842,88 @@ class DomainDetailView(APIView):
             status=status.HTTP_200_OK,
         )
 
+class MetaView(APIView):
+    """
+    All choice sets (countries, currencies, industries, stages, ...) in one
+    static response. It carries a content-hash ETag and a long max-age, so
+    clients fetch it once per release and revalidate with If-None-Match.
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+    cache_control = "public, max-age=86400"
+
+    @extend_schema(tags=["Meta"])
+    def get(self, request, format=None):
+        choices, etag = get_choices_payload()
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (
+            if_none_match.strip() == "*" or etag in parse_etags(if_none_match)
+        ):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(
+                {"error": False, "choices": choices}, status=status.HTTP_200_OK
+            )
+        response["ETag"] = etag
+        response["Cache-Control"] = self.cache_control
+        return response
+
+
+class OrgLookupView(APIView):
+    """
+    One org-scoped lookup collection (contacts, teams, tags or users), served
+    from a per-org cache that is dropped whenever the collection changes.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Lookups"], parameters=swagger_params1.organization_params)
+    def get(self, request, name, format=None):
+        if name not in LOOKUPS:
+            return Response(
+                {"error": True, "errors": "Unknown lookup"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(
+            {"error": False, name: get_lookup(request.profile.org, name)},
+            status=status.HTTP_200_OK,
+        )
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over the org's accounts, contacts, tasks and
+    documents; every word of ``q`` is matched as a prefix.
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Search"], parameters=swagger_params1.search_params)
+    def get(self, request, format=None):
+        params = request.query_params
+        types = [name for name in params.get("types", "").split(",") if name]
+        unknown = set(types) - set(SEARCH_TYPES)
+        if unknown:
+            return Response(
+                {"error": True, "errors": "Unknown types: %s" % ", ".join(sorted(unknown))},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = min(int(params.get("limit", SEARCH_RESULTS_LIMIT)), SEARCH_RESULTS_MAX_LIMIT)
+        except ValueError:
+            limit = SEARCH_RESULTS_LIMIT
+        profile = request.profile
+        results = search(
+            profile,
+            profile.role == "ADMIN" or profile.is_admin,
+            params.get("q", ""),
+            types=types or SEARCH_TYPES,
+            limit=max(limit, 1),
+        )
+        return Response({"error": False, "results": results}, status=status.HTTP_200_OK)
+
+
 class GoogleLoginView(APIView):
     """
     Check for authentication with google
@@ -904,3 +961,22 @@ class GoogleLoginView(APIView):
         response['refresh_token'] = str(token)
         response['user_id'] = user.id
         return Response(response)
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Per-route request/query metrics in Prometheus text format.
+
+    Off unless METRICS_TOKEN is set; scrapers send it as a bearer token.
+    The client address is not trusted: behind a same-host proxy every
+    request comes from loopback.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token or not secrets.compare_digest(
+        request.headers.get("Authorization", ""), "Bearer %s" % token
+    ):
+        raise Http404
+    return HttpResponse(
+        registry.render_prometheus(), content_type="text/plain; version=0.0.4"
+    )
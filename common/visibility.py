@@ -0,0 +1,128 @@
+"""
+Precomputed visibility of org objects for non-admin profiles.
+
+A non-admin profile sees the objects it created or is assigned to (team
+members are copied into ``assigned_to`` by ``teams.tasks``). Rather than
+OR-ing a join on ``created_by`` and one on the ``assigned_to`` through
+table and de-duplicating with DISTINCT, the (object, profile) pairs are
+stored in ``ObjectVisibility`` and list views filter with a semi-join on
+its unique (profile, object_type, object_id) index.
+
+``common.signals`` calls ``refresh_visibility`` whenever an object is
+saved or deleted or its ``assigned_to`` links change.
+"""
+from accounts.models import Account
+from common.m2m import M2M_BATCH_SIZE, chunked, m2m_through
+from common.models import ObjectVisibility, Profile
+from contacts.models import Contact
+
+VISIBLE_MODELS = (Account, Contact)
+MEMBER_FIELD = "assigned_to"
+
+
+def filter_visible(queryset, profile):
+    """Restrict ``queryset`` to the objects ``profile`` may see."""
+    return queryset.filter(
+        pk__in=ObjectVisibility.objects.filter(
+            profile=profile, object_type=queryset.model._meta.label
+        ).values("object_id")
+    )
+
+
+def creator_profile_ids(rows, profile_model=Profile):
+    """Map each row's pk to the profile of its creator in the row's org."""
+    rows = [row for row in rows if row["created_by_id"] and row["org_id"]]
+    if not rows:
+        return {}
+    profiles = {
+        (org_id, user_id): profile_id
+        for org_id, user_id, profile_id in profile_model.objects.filter(
+            org_id__in={row["org_id"] for row in rows},
+            user_id__in={row["created_by_id"] for row in rows},
+        ).values_list("org_id", "user_id", "id")
+    }
+    return {
+        row["pk"]: profiles.get((row["org_id"], row["created_by_id"])) for row in rows
+    }
+
+
+def visible_pairs(model, object_ids, profile_model=Profile):
+    """The (object id, profile id) pairs that should exist for ``object_ids``."""
+    rows = model._default_manager.filter(pk__in=object_ids).values(
+        "pk", "org_id", "created_by_id"
+    )
+    pairs = {
+        (object_id, profile_id)
+        for object_id, profile_id in creator_profile_ids(rows, profile_model).items()
+        if profile_id
+    }
+    through, source, target = m2m_through(model, MEMBER_FIELD)
+    pairs.update(
+        through.objects.filter(**{source + "__in": object_ids}).values_list(
+            source, target
+        )
+    )
+    return pairs
+
+
+def refresh_visibility(
+    model,
+    object_ids,
+    batch_size=M2M_BATCH_SIZE,
+    profile_model=Profile,
+    visibility_model=ObjectVisibility,
+):
+    """
+    Bring the visibility rows of ``object_ids`` in line with their creator
+    and assignees, a few statements per batch. Ids of deleted objects lose
+    all their rows. The model arguments let migrations pass historical
+    models.
+    """
+    object_type = model._meta.label
+    for chunk in chunked(object_ids, batch_size):
+        wanted = visible_pairs(model, chunk, profile_model)
+        existing = {}
+        for pk, object_id, profile_id in visibility_model.objects.filter(
+            object_type=object_type, object_id__in=chunk
+        ).values_list("pk", "object_id", "profile_id"):
+            existing[(object_id, profile_id)] = pk
+        stale = [pk for pair, pk in existing.items() if pair not in wanted]
+        if stale:
+            visibility_model.objects.filter(pk__in=stale).delete()
+        visibility_model.objects.bulk_create(
+            [
+                visibility_model(
+                    object_type=object_type, object_id=object_id, profile_id=profile_id
+                )
+                for object_id, profile_id in wanted
+                if (object_id, profile_id) not in existing
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def forget_visibility(model, object_ids):
+    ObjectVisibility.objects.filter(
+        object_type=model._meta.label, object_id__in=object_ids
+    ).delete()
+
+
+def members_changing(model, instance, action, reverse):
+    """pre_clear on the profile side: remember which objects lose the profile."""
+    if reverse and action == "pre_clear":
+        through, source, target = m2m_through(model, MEMBER_FIELD)
+        instance._visibility_unlinked = list(
+            through.objects.filter(**{target: instance.pk}).values_list(
+                source, flat=True
+            )
+        )
+
+
+def members_changed(model, instance, action, reverse, pk_set):
+    if not reverse:
+        object_ids = [instance.pk]
+    elif action == "post_clear":
+        object_ids = getattr(instance, "_visibility_unlinked", [])
+    else:
+        object_ids = pk_set or []
+    refresh_visibility(model, object_ids)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from contacts.models import Contact
+from contacts.models import Contact, ContactImport
 
 admin.site.register(Contact)
+admin.site.register(ContactImport)
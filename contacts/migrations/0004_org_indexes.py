@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('contacts', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='contact',
+            index=models.Index(fields=['org', 'created_at', 'id'], name='contact_org_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='contact',
+            index=models.Index(models.F('org'), django.db.models.functions.text.Upper('first_name'), name='contact_org_upper_first_name'),
+        ),
+    ]
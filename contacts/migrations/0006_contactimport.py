@@ -0,0 +1,45 @@
+import common.base
+import contacts.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('teams', '0004_uuid7_ids'),
+        ('common', '0009_uuid7_ids'),
+        ('contacts', '0005_uuid7_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactImport',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('file', models.FileField(max_length=1000, upload_to=contacts.models.contact_import_path)),
+                ('file_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=16)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('assigned_to', models.ManyToManyField(related_name='contact_import_assigned_users', to='common.profile')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to=settings.AUTH_USER_MODEL, verbose_name='Created By')),
+                ('org', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contact_imports', to='common.org')),
+                ('teams', models.ManyToManyField(related_name='contact_import_teams', to='teams.teams')),
+                ('updated_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By')),
+            ],
+            options={
+                'verbose_name': 'Contact import',
+                'verbose_name_plural': 'Contact imports',
+                'db_table': 'contact_import',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
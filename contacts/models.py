@@ -1,8 +1,15 @@
+import time
+
 import arrow
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 
+from common.indexes import trigram_index
 from common.models import Address, Org, Profile
 from common.base import BaseModel
 from common.utils import COUNTRIES
@@ -44,12 +51,25 @@ class Contact(BaseModel):
     teams = models.ManyToManyField(Teams, related_name="contact_teams")
     org = models.ForeignKey(Org, on_delete=models.SET_NULL, null=True, blank=True)
     country = models.CharField(max_length=3, choices=COUNTRIES, blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Contact"
         verbose_name_plural = "Contacts"
         db_table = "contacts"
         ordering = ("-created_at",)
+        indexes = [
+            GinIndex(fields=["search_vector"], name="contact_search_vector"),
+            trigram_index("first_name", "contact_first_name_trgm"),
+            trigram_index("primary_email", "contact_primary_email_trgm"),
+            trigram_index("mobile_number", "contact_mobile_number_trgm"),
+            models.Index(
+                fields=["org", "created_at", "id"], name="contact_org_created"
+            ),
+            models.Index(
+                F("org"), Upper("first_name"), name="contact_org_upper_first_name"
+            ),
+        ]
 
     def __str__(self):
         return self.first_name
@@ -81,3 +101,45 @@ class Contact(BaseModel):
         assigned_user_ids = list(self.assigned_to.values_list("id", flat=True))
         user_ids = set(assigned_user_ids) - set(team_user_ids)
         return Profile.objects.filter(id__in=list(user_ids))
+
+
+def contact_import_path(self, filename):
+    return "imports/contacts/%s/%s" % (int(time.time()), filename)
+
+
+class ContactImport(BaseModel):
+    """A CSV/XLSX upload of contacts, imported in batches by a Celery task."""
+
+    STATUS_CHOICES = (
+        ("pending", "pending"),
+        ("running", "running"),
+        ("done", "done"),
+        ("failed", "failed"),
+    )
+
+    org = models.ForeignKey(
+        Org, on_delete=models.CASCADE, related_name="contact_imports"
+    )
+    file = models.FileField(upload_to=contact_import_path, max_length=1000)
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(choices=STATUS_CHOICES, max_length=16, default="pending")
+    # Applied to every imported contact.
+    assigned_to = models.ManyToManyField(
+        Profile, related_name="contact_import_assigned_users"
+    )
+    teams = models.ManyToManyField(Teams, related_name="contact_import_teams")
+    total_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # The first CONTACT_IMPORT_MAX_ERRORS ``{"row": n, "errors": {field: [...]}}``.
+    errors = models.JSONField(default=list, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Contact import"
+        verbose_name_plural = "Contact imports"
+        db_table = "contact_import"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return self.file_name
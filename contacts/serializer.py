@@ -3,30 +3,70 @@ from rest_framework import serializers
 from common.serializer import (
     AttachmentsSerializer,
     BillingAddressSerializer,
+    EagerLoadingListSerializer,
+    EagerLoadingMixin,
     OrganizationSerializer,
     ProfileSerializer,
+    ValuesSummarySerializer,
 )
-from contacts.models import Contact
+from contacts.imports import CONTACT_IMPORT_EXTENSIONS
+from contacts.models import Contact, ContactImport
 from teams.serializer import TeamsSerializer
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     teams = TeamsSerializer(read_only=True, many=True)
     assigned_to = ProfileSerializer(read_only=True, many=True)
     address = BillingAddressSerializer(read_only=True)
-    get_team_users = ProfileSerializer(read_only=True, many=True)
-    get_team_and_assigned_users = ProfileSerializer(read_only=True, many=True)
-    get_assigned_users_not_in_teams = ProfileSerializer(read_only=True, many=True)
+    get_team_users = serializers.SerializerMethodField()
+    get_team_and_assigned_users = serializers.SerializerMethodField()
+    get_assigned_users_not_in_teams = serializers.SerializerMethodField()
     contact_attachment = AttachmentsSerializer(read_only=True, many=True)
     date_of_birth = serializers.DateField()
     org = OrganizationSerializer()
     country = serializers.SerializerMethodField()
 
+    select_related_fields = ("org", "address")
+    prefetch_related_fields = ("contact_attachment",)
+    nested_serializers = {"teams": TeamsSerializer, "assigned_to": ProfileSerializer}
+
     def get_country(self, obj):
         return obj.get_country_display()
 
+    # The three user sets below mirror the Contact properties of the same
+    # name, but are computed from the prefetched teams and assigned_to
+    # instead of querying per contact.
+    def _team_users(self, obj):
+        return {
+            profile.id: profile for team in obj.teams.all() for profile in team.users.all()
+        }
+
+    def _assigned_users(self, obj):
+        return {profile.id: profile for profile in obj.assigned_to.all()}
+
+    def _profiles_data(self, profiles):
+        profiles = sorted(profiles, key=lambda profile: profile.created_at, reverse=True)
+        return ProfileSerializer(profiles, many=True).data
+
+    def get_get_team_users(self, obj):
+        return self._profiles_data(self._team_users(obj).values())
+
+    def get_get_team_and_assigned_users(self, obj):
+        users = self._team_users(obj)
+        users.update(self._assigned_users(obj))
+        return self._profiles_data(users.values())
+
+    def get_get_assigned_users_not_in_teams(self, obj):
+        team_users = self._team_users(obj)
+        return self._profiles_data(
+            profile
+            for profile_id, profile in self._assigned_users(obj).items()
+            if profile_id not in team_users
+        )
+
     class Meta:
         model = Contact
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "salutation",
@@ -62,6 +102,42 @@ class ContactSerializer(serializers.ModelSerializer):
         )
 
 
+class ContactSummarySerializer(ValuesSummarySerializer):
+    model = Contact
+    fields = (
+        "salutation",
+        "first_name",
+        "last_name",
+        "date_of_birth",
+        "organization",
+        "title",
+        "primary_email",
+        "secondary_email",
+        "mobile_number",
+        "secondary_number",
+        "department",
+        "country",
+        "language",
+        "do_not_call",
+        "description",
+        "linked_in_url",
+        "facebook_url",
+        "twitter_username",
+        "created_by",
+        "created_at",
+        "is_active",
+    )
+    default_fields = (
+        "first_name",
+        "last_name",
+        "primary_email",
+        "mobile_number",
+        "organization",
+        "created_at",
+    )
+    expandable_fields = {"teams": TeamsSerializer, "assigned_to": ProfileSerializer}
+
+
 class CreateContactSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
         request_obj = kwargs.pop("request_obj", None)
@@ -119,3 +195,32 @@ class ContactDetailEditSwaggerSerializer(serializers.Serializer):
 
 class ContactCommentEditSwaggerSerializer(serializers.Serializer):
     comment = serializers.CharField()
+
+
+class ContactImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContactImport
+        fields = (
+            "id",
+            "file_name",
+            "status",
+            "total_rows",
+            "created_count",
+            "error_count",
+            "errors",
+            "created_at",
+            "finished_at",
+        )
+
+
+class ContactImportCreateSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    assigned_to = serializers.ListField(
+        child=serializers.UUIDField(), required=False, default=list
+    )
+    teams = serializers.ListField(child=serializers.UUIDField(), required=False, default=list)
+
+    def validate_file(self, file):
+        if not file.name.lower().endswith(CONTACT_IMPORT_EXTENSIONS):
+            raise serializers.ValidationError("Upload a .csv or .xlsx file")
+        return file
@@ -14,6 +14,12 @@ contact_list_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("assigned_to", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT,OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL,OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("expand", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("include_choices", OpenApiTypes.BOOL,OpenApiParameter.QUERY),
 ]
 
 contact_create_post_params = [
@@ -58,4 +64,11 @@ contact_create_post_params = [
     OpenApiParameter("teams", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("assigned_to", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("contact_attachment", OpenApiParameter.QUERY, OpenApiTypes.BINARY),
-]
\ No newline at end of file
+]
+
+export_params = [
+    organization_params_in_header,
+    OpenApiParameter(
+        "output", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["csv", "ndjson"]
+    ),
+]
@@ -4,7 +4,8 @@ from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 
 from common.models import Profile
-from contacts.models import Contact
+from contacts.imports import import_contacts
+from contacts.models import Contact, ContactImport
 
 app = Celery("redis://")
 
@@ -32,3 +33,10 @@ def send_email_to_assigned_user(recipients, contact_id):
             msg = EmailMessage(subject, html_content, to=recipients_list)
             msg.content_subtype = "html"
             msg.send()
+
+
+@app.task
+def run_contact_import(import_id):
+    """Import the rows of an uploaded contacts file"""
+    job = ContactImport.objects.select_related("created_by").get(id=import_id)
+    import_contacts(job)
@@ -0,0 +1,210 @@
+import tempfile
+from unittest.mock import patch
+
+from crum import impersonate
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.m2m import add_m2m_links, remove_m2m_links
+from common.models import Org, Profile, User
+from common.search import search
+from common.visibility import filter_visible
+from contacts.imports import ContactImporter
+from contacts.models import Contact, ContactImport
+from contacts.serializer import ContactSerializer, ContactSummarySerializer
+from teams.models import Teams
+
+
+class ContactSerializerQueriesTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(email="user%d@example.com" % i), org=self.org
+            )
+            for i in range(3)
+        ]
+        self.team = Teams.objects.create(name="team", description="team", org=self.org)
+        self.team.users.add(self.profiles[0], self.profiles[1])
+
+    def create_contacts(self, count):
+        for i in range(Contact.objects.count(), count):
+            contact = Contact.objects.create(
+                first_name="contact%d" % i,
+                last_name="last",
+                primary_email="contact%d@example.com" % i,
+                org=self.org,
+            )
+            contact.teams.add(self.team)
+            contact.assigned_to.add(self.profiles[1], self.profiles[2])
+
+    def serialize(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = ContactSerializer(
+                Contact.objects.filter(org=self.org), many=True
+            ).data
+        return data, len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.create_contacts(2)
+        _, small_page_queries = self.serialize()
+        self.create_contacts(10)
+        data, large_page_queries = self.serialize()
+        self.assertEqual(len(data), 10)
+        self.assertEqual(small_page_queries, large_page_queries)
+
+    def test_user_sets(self):
+        self.create_contacts(1)
+        data, _ = self.serialize()
+        ids = lambda users: {user["id"] for user in users}
+        team_users = {str(self.profiles[0].id), str(self.profiles[1].id)}
+        self.assertEqual(ids(data[0]["get_team_users"]), team_users)
+        self.assertEqual(
+            ids(data[0]["get_team_and_assigned_users"]),
+            {str(profile.id) for profile in self.profiles},
+        )
+        self.assertEqual(
+            ids(data[0]["get_assigned_users_not_in_teams"]), {str(self.profiles[2].id)}
+        )
+
+    def test_summary_fields_and_expand(self):
+        self.create_contacts(3)
+        summary = ContactSummarySerializer(fields=["first_name"], expand=["teams"])
+        rows = list(summary.get_queryset(Contact.objects.filter(org=self.org)))
+        # contact pks, teams (+created_by) and their users (+user)
+        with self.assertNumQueries(3):
+            data = summary.to_representation(rows)
+        self.assertEqual(set(data[0]), {"id", "first_name", "teams"})
+        self.assertEqual(data[0]["teams"][0]["id"], str(self.team.id))
+
+
+class ObjectVisibilityTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.creator, self.member = [
+            Profile.objects.create(
+                user=User.objects.create(email="user%d@example.com" % i), org=self.org
+            )
+            for i in range(2)
+        ]
+        with impersonate(self.creator.user):
+            self.contact = Contact.objects.create(
+                first_name="contact",
+                last_name="last",
+                primary_email="contact@example.com",
+                org=self.org,
+            )
+
+    def visible(self, profile):
+        return list(filter_visible(Contact.objects.all(), profile))
+
+    def test_creator_and_assignees_see_the_contact(self):
+        self.assertEqual(self.visible(self.creator), [self.contact])
+        self.assertEqual(self.visible(self.member), [])
+        self.contact.assigned_to.add(self.creator, self.member)
+        self.assertEqual(self.visible(self.creator), [self.contact])
+        self.assertEqual(self.visible(self.member), [self.contact])
+        self.member.contact_assigned_users.clear()
+        self.assertEqual(self.visible(self.member), [])
+        self.contact.assigned_to.clear()
+        self.assertEqual(self.visible(self.creator), [self.contact])
+
+    def test_bulk_links_refresh_visibility(self):
+        links = (Contact, "assigned_to", [self.contact.id], [self.member.id, self.creator.id])
+        self.contact.assigned_to.add(self.creator)
+        self.assertEqual(add_m2m_links(*links), 1)
+        self.assertEqual(add_m2m_links(*links), 0)
+        self.assertEqual(self.visible(self.member), [self.contact])
+        remove_m2m_links(Contact, "assigned_to", [self.contact.id], [self.member.id])
+        self.assertEqual(self.visible(self.member), [])
+
+    def test_deleted_contact_leaves_no_rows(self):
+        self.contact.delete()
+        self.assertFalse(self.creator.visible_objects.exists())
+
+    def test_search_matches_prefixes_of_visible_contacts(self):
+        self.contact.first_name = "Jonathan"
+        self.contact.last_name = "Smithers"
+        with impersonate(self.creator.user):
+            self.contact.save()
+        hits = search(self.creator, False, "jon smith")
+        self.assertEqual([hit["id"] for hit in hits], [str(self.contact.id)])
+        self.assertEqual(hits[0]["title"], "Jonathan Smithers")
+        self.assertEqual(search(self.member, False, "jon smith"), [])
+        self.assertEqual(len(search(self.member, True, "jon smith")), 1)
+        self.assertEqual(search(self.creator, False, "jon nobody"), [])
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ContactImportTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="org")
+        self.profile = Profile.objects.create(
+            user=User.objects.create(email="user@example.com"), org=self.org
+        )
+        Contact.objects.create(
+            first_name="old", last_name="old", primary_email="taken@example.com", org=self.org
+        )
+
+        self.headers = {
+            "HTTP_AUTHORIZATION": "Bearer %s" % AccessToken.for_user(self.profile.user),
+            "HTTP_ORG": str(self.org.id),
+        }
+
+    def run_import(self, content, batch_size=2):
+        def run(import_id):
+            ContactImporter(ContactImport.objects.get(id=import_id), batch_size).run()
+
+        upload = SimpleUploadedFile("contacts.csv", content.encode("utf-8"))
+        with patch("contacts.views.run_contact_import.delay", side_effect=run):
+            response = self.client.post("/contacts/import/", {"file": upload}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        return ContactImport.objects.get(id=response.json()["import"]["id"])
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        job = self.run_import(
+            "First Name,Last Name,Primary Email,Mobile Number,City\n"
+            "ann,a,ann@example.com,+14155550100,Paris\n"
+            "bob,b,taken@example.com,,\n"
+            "cat,c,not-an-email,,\n"
+            "\n"
+            "dan,d,ann@example.com,,\n"
+            "eve,e,eve@example.com,+14155550100,\n"
+            "fay,f,fay@example.com,,\n"
+        )
+        self.assertEqual(job.status, "done")
+        self.assertEqual((job.total_rows, job.created_count, job.error_count), (6, 2, 4))
+        self.assertEqual(
+            [(error["row"], sorted(error["errors"])) for error in job.errors],
+            [
+                (3, ["primary_email"]),
+                (4, ["primary_email"]),
+                (6, ["primary_email"]),
+                (7, ["mobile_number"]),
+            ],
+        )
+        ann = Contact.objects.get(primary_email="ann@example.com")
+        self.assertEqual(ann.address.city, "Paris")
+        self.assertEqual(ann.created_by, self.profile.user)
+        self.assertIsNone(Contact.objects.get(primary_email="fay@example.com").address)
+        # The importer assigned nobody but still sees what they created.
+        self.assertEqual(filter_visible(Contact.objects.all(), self.profile).count(), 2)
+
+    def test_missing_columns_fail_the_job(self):
+        job = self.run_import("name,email\nann,ann@example.com\n")
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.created_count, 0)
+        self.assertIn("first_name", job.errors[0]["errors"]["file"][0])
+
+    def test_json_body_is_a_bad_request(self):
+        response = self.client.post(
+            "/contacts/import/",
+            {"assigned_to": [str(self.profile.id)]},
+            content_type="application/json",
+            **self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ContactImport.objects.exists())
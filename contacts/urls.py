@@ -6,6 +6,10 @@ app_name = "api_contacts"
 
 urlpatterns = [
     path('list/', views.ContactsListView.as_view(), name='list'),
+    path("export/", views.ContactsExportView.as_view(), name="export"),
+    path("assign/", views.ContactsBulkAssignView.as_view(), name="assign"),
+    path("import/", views.ContactImportView.as_view(), name="import"),
+    path("import/<str:pk>/", views.ContactImportDetailView.as_view()),
     path("<str:pk>/", views.ContactDetailView.as_view()),
     path("comment/<str:pk>/", views.ContactCommentView.as_view()),
     path("attachment/<str:pk>/", views.ContactAttachmentView.as_view()),
@@ -1,43 +1,47 @@
 import json
 
-from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.assignment import BulkAssignView
+from common.choices import wants_choices
+from common.conditional import conditional_get
+from common.export import CONTACT_EXPORT, export_output, stream_export
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.pagination import KeysetPagination
+from common.response_cache import cache_response
 from common.serializer import (
     AttachmentsSerializer,
+    BulkAssignSerializer,
     BillingAddressSerializer,
     CommentSerializer,
 )
 from common.utils import COUNTRIES
+from common.visibility import filter_visible
 
 #from common.external_auth import CustomDualAuthentication
 from contacts import swagger_params1
-from contacts.models import Contact, Profile
+from contacts.models import Contact, ContactImport, Profile
 from contacts.serializer import *
-from contacts.tasks import send_email_to_assigned_user
+from contacts.tasks import run_contact_import, send_email_to_assigned_user
 from teams.models import Teams
 
 
-class ContactsListView(APIView, LimitOffsetPagination):
+class ContactsListView(APIView, KeysetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Contact
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
-            queryset = queryset.filter(
-                Q(assigned_to__in=[self.request.profile])
-                | Q(created_by=self.request.profile.user)
-            ).distinct()
+            queryset = filter_visible(queryset, self.request.profile)
 
         if params:
             if params.get("name"):
@@ -54,22 +58,27 @@ class ContactsListView(APIView, LimitOffsetPagination):
                 ).distinct()
 
         context = {}
+        summary = ContactSummarySerializer.from_request(self.request)
+        if summary:
+            queryset = summary.get_queryset(queryset)
         results_contact = self.paginate_queryset(
-            queryset.distinct(), self.request, view=self
+            queryset, self.request, view=self
         )
-        contacts = ContactSerializer(results_contact, many=True).data
-        if results_contact:
-            offset = queryset.filter(id__gte=results_contact[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        if summary:
+            contacts = summary.to_representation(results_contact)
         else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context.update({"contacts_count": self.count, "offset": offset})
+            contacts = ContactSerializer(results_contact, many=True).data
+        context["per_page"] = self.limit
+        context.update(
+            {
+                "contacts_count": self.count,
+                "next": self.next_cursor,
+                "previous": self.previous_cursor,
+            }
+        )
         context["contact_obj_list"] = contacts
-        context["countries"] = COUNTRIES
+        if wants_choices(self.request):
+            context["countries"] = COUNTRIES
         users = Profile.objects.filter(is_active=True, org=self.request.profile.org).values(
             "id", "user__email"
         )
@@ -80,6 +89,15 @@ class ContactsListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["contacts"], parameters=swagger_params1.contact_list_get_params
     )
+    @conditional_get
+    @cache_response(
+        "contacts.Contact",
+        "teams.Teams",
+        "common.Profile",
+        "common.Address",
+        "common.Attachments",
+        "common.Org",
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -198,30 +216,24 @@ class ContactDetailView(APIView):
             contact_obj.address = address_obj
             contact_obj.save()
             contact_obj = contact_serializer.save()
-            contact_obj.teams.clear()
+            team_ids = []
             if data.get("teams"):
                 teams_list = json.loads(data.get("teams"))
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                contact_obj.teams.add(*teams)
+                team_ids = Teams.objects.filter(
+                    id__in=teams_list, org=request.profile.org
+                ).values_list("id", flat=True)
+            sync_m2m(contact_obj, "teams", team_ids)
 
-            contact_obj.assigned_to.clear()
+            profile_ids = []
             if data.get("assigned_to"):
                 assinged_to_list = json.loads(data.get("assigned_to"))
-                profiles = Profile.objects.filter(
+                profile_ids = Profile.objects.filter(
                     id__in=assinged_to_list, org=request.profile.org
-                )
-                contact_obj.assigned_to.add(*profiles)
-
-            previous_assigned_to_users = list(
-                contact_obj.assigned_to.all().values_list("id", flat=True)
-            )
+                ).values_list("id", flat=True)
+            recipients, _ = sync_m2m(contact_obj, "assigned_to", profile_ids)
 
-            assigned_to_list = list(
-                contact_obj.assigned_to.all().values_list("id", flat=True)
-            )
-            recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
             send_email_to_assigned_user.delay(
-                recipients,
+                list(recipients),
                 contact_obj.id,
             )
             if request.FILES.get("contact_attachment"):
@@ -239,6 +251,18 @@ class ContactDetailView(APIView):
     @extend_schema(
         tags=["contacts"], parameters=swagger_params1.organization_params
     )
+    @conditional_get
+    @cache_response(
+        "contacts.Contact",
+        "accounts.Account",
+        "tasks.Task",
+        "teams.Teams",
+        "common.Profile",
+        "common.Address",
+        "common.Attachments",
+        "common.Comment",
+        "common.Org",
+    )
     def get(self, request, pk, format=None):
         context = {}
         contact_obj = self.get_object(pk)
@@ -287,7 +311,8 @@ class ContactDetailView(APIView):
             user_assgn_list.append(self.request.profile.id)
 
         context["address_obj"] = BillingAddressSerializer(contact_obj.address).data
-        context["countries"] = COUNTRIES
+        if wants_choices(self.request):
+            context["countries"] = COUNTRIES
         context.update(
             {
                 "comments": CommentSerializer(
@@ -476,3 +501,101 @@ class ContactAttachmentView(APIView):
             },
             status=status.HTTP_403_FORBIDDEN,
         )
+
+
+class ContactsExportView(APIView):
+    """Stream every contact the caller may see as CSV or NDJSON."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["contacts"], parameters=swagger_params1.export_params)
+    def get(self, request, format=None):
+        output = export_output(request)
+        if output is None:
+            return Response(
+                {"error": True, "errors": "Unsupported output format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = Contact.objects.filter(org=request.profile.org)
+        if request.profile.role != "ADMIN" and not request.profile.is_admin:
+            queryset = filter_visible(queryset, request.profile)
+        return stream_export(CONTACT_EXPORT, queryset, output)
+
+
+class ContactImportView(APIView):
+    """Start a bulk import of contacts from a CSV or XLSX file."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        tags=["contacts"],
+        parameters=swagger_params1.organization_params,
+        request=ContactImportCreateSerializer,
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = ContactImportCreateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"error": True, "errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        upload = serializer.validated_data["file"]
+        user = request.profile.user
+        job = ContactImport.objects.create(
+            org=request.profile.org, file=upload, file_name=upload.name
+        )
+        # BaseModel.save only stamps the user crum knows about; the importer
+        # becomes the creator of every imported contact, so set it here.
+        ContactImport.objects.filter(pk=job.pk).update(created_by=user, updated_by=user)
+        job.created_by = job.updated_by = user
+        assigned_to = serializer.validated_data["assigned_to"]
+        if assigned_to:
+            job.assigned_to.add(
+                *Profile.objects.filter(id__in=assigned_to, org=request.profile.org)
+            )
+        teams = serializer.validated_data["teams"]
+        if teams:
+            job.teams.add(*Teams.objects.filter(id__in=teams, org=request.profile.org))
+        run_contact_import.delay(job.id)
+        return Response(
+            {
+                "error": False,
+                "message": "Contact import started",
+                "import": ContactImportSerializer(job).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ContactImportDetailView(APIView):
+    """Progress and per-row errors of a contact import."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["contacts"], parameters=swagger_params1.organization_params)
+    def get(self, request, pk, format=None):
+        job = get_object_or_404(ContactImport, pk=pk, org=request.profile.org)
+        return Response(
+            {"error": False, "import": ContactImportSerializer(job).data},
+            status=status.HTTP_200_OK,
+        )
+
+
+class ContactsBulkAssignView(BulkAssignView):
+    """Add and remove assigned users on many contacts at once."""
+
+    model = Contact
+    filters = {
+        "name": "first_name__icontains",
+        "city": "address__city__icontains",
+        "phone": "mobile_number__icontains",
+        "email": "primary_email__icontains",
+    }
+
+    @extend_schema(
+        tags=["contacts"],
+        parameters=swagger_params1.organization_params,
+        request=BulkAssignSerializer,
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'common.middleware.query_metrics.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -160,6 +161,29 @@ ADMIN_EMAIL = os.environ["ADMIN_EMAIL"]
 CELERY_BROKER_URL = os.environ["CELERY_BROKER_URL"]
 CELERY_RESULT_BACKEND = os.environ["CELERY_RESULT_BACKEND"]
 
+# Shared cache (auth lookups, per-org caches). Falls back to the per-process
+# local memory cache when no Redis URL is configured.
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+
+# Lifetimes (seconds) of the cached user/profile lookups used for auth
+AUTH_CACHE_TIMEOUT = int(os.getenv("AUTH_CACHE_TIMEOUT", "300"))
+AUTH_LOCAL_CACHE_TIMEOUT = int(os.getenv("AUTH_LOCAL_CACHE_TIMEOUT", "5"))
+API_KEY_CACHE_TIMEOUT = int(os.getenv("API_KEY_CACHE_TIMEOUT", "60"))
+API_KEY_CACHE_SIZE = int(os.getenv("API_KEY_CACHE_SIZE", "256"))
+LOOKUP_CACHE_TIMEOUT = int(os.getenv("LOOKUP_CACHE_TIMEOUT", "600"))
+# Versioned GET response cache; generation counters must live in a shared
+# cache, so it is only switched on with Redis.
+RESPONSE_CACHE_ENABLED = bool(REDIS_URL) and os.getenv("RESPONSE_CACHE_ENABLED", "true") == "true"
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+CONDITIONAL_GET_ENABLED = bool(REDIS_URL) and os.getenv("CONDITIONAL_GET_ENABLED", "true") == "true"
+
 
 LOGGING = {
     "version": 1,
@@ -218,9 +242,28 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        "common.middleware.query_metrics": {
+            "handlers": ["console", "logfile"],
+            "level": "WARNING",
+            "propagate": False,
+        },
     },
 }
 
+# Text search configuration of the full-text search vectors; "simple"
+# does no stemming, which suits names and email addresses.
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", "simple")
+# Number of recent accounts/contacts listed on the dashboard.
+DASHBOARD_RECENT_LIMIT = int(os.getenv("DASHBOARD_RECENT_LIMIT", "10"))
+# Rows fetched per server-side cursor round trip by the CSV/NDJSON exports.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+# Rows validated, deduplicated and inserted together by contact imports.
+CONTACT_IMPORT_BATCH_SIZE = int(os.getenv("CONTACT_IMPORT_BATCH_SIZE", "2000"))
+# Requests running more SQL statements than this are logged; 0 disables it.
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "50"))
+# Bearer token scrapers must send to read /metrics; unset keeps it off.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 APPLICATION_NAME = "bottlecrm"
 
 WAGTAIL_SITE_NAME = "bottlecrm"
@@ -232,8 +275,11 @@ SETTINGS_EXPORT = ["APPLICATION_NAME"]
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
     "DEFAULT_AUTHENTICATION_CLASSES": (
+        # CustomDualAuthentication goes first: it resolves JWT and API-key
+        # requests from the cached profile lookup and sets request.profile.
+        # Like JWTAuthentication it only accepts access tokens of active users.
+        "common.external_auth.CustomDualAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "common.external_auth.CustomDualAuthentication"
         # "rest_framework.authentication.SessionAuthentication",
         # "rest_framework.authentication.BasicAuthentication",
     ),
@@ -15,6 +15,8 @@ from drf_spectacular.views import (
 # from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from common.views import metrics_view
+
 
 app_name = "crm"
 
@@ -24,6 +26,7 @@ urlpatterns = [
         TemplateView.as_view(template_name="healthz.html"),
         name="healthz",
     ),
+    path("metrics", metrics_view, name="metrics"),
     path("api/", include("common.app_urls", namespace="common_urls")),
     path(
         "logout/", views.LogoutView.as_view(), {"next_page": "/login/"}, name="logout"
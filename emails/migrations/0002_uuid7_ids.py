@@ -0,0 +1,20 @@
+import common.base
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Only the Python-side default changes: existing rows keep their
+    # uuid4 keys and no table is rewritten.
+
+    dependencies = [
+        ('emails', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='email',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
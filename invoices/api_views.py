@@ -22,6 +22,7 @@ from common.serializer import (
     CommentSerializer,
     UserSerializer,
 )
+from common.choices import wants_choices
 from common.utils import COUNTRIES, CURRENCY_CODES
 from invoices import swagger_params1
 from invoices.models import Invoice
@@ -126,8 +127,9 @@ class InvoiceListView(APIView, LimitOffsetPagination):
                 Teams.objects.filter(company=self.request.company), many=True
             ).data
         context["status"] = INVOICE_STATUS
-        context["currency"] = CURRENCY_CODES
-        context["countries"] = COUNTRIES
+        if wants_choices(self.request):
+            context["currency"] = CURRENCY_CODES
+            context["countries"] = COUNTRIES
 
         return context
 
@@ -478,10 +480,10 @@ class InvoiceDetailView(APIView):
                 "comment_permission": comment_permission,
                 "users_mention": users_mention,
                 "status": INVOICE_STATUS,
-                "currency": CURRENCY_CODES,
-                "countries": COUNTRIES,
             }
         )
+        if wants_choices(self.request):
+            context.update({"currency": CURRENCY_CODES, "countries": COUNTRIES})
         return Response(context)
 
     @swagger_auto_schema(
@@ -0,0 +1,25 @@
+import common.base
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Only the Python-side default changes: existing rows keep their
+    # uuid4 keys and no table is rewritten.
+
+    dependencies = [
+        ('invoices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='invoicecomment',
+            name='id',
+            field=models.UUIDField(db_index=True, default=common.base.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
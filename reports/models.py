@@ -1,6 +1,7 @@
 from django.db import models
 from common.models import User, Org
 from accounts.models import Account
+from common.export import ACCOUNT_EXPORT
 
 class Report(models.Model):
     name = models.CharField(max_length=200)
@@ -15,7 +16,8 @@ class Report(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def generate_report(self):
-        if self.report_type == 'lead':
-            return Lead.objects.filter(org=self.org).values()
-        elif self.report_type == 'account':
-            return Account.objects.filter(org=self.org).values() 
\ No newline at end of file
+        """Stream the rows of the report, or None for types without data."""
+        # There is no leads app to report on, and sales has no source yet.
+        if self.report_type == 'account':
+            return ACCOUNT_EXPORT.rows(Account.objects.filter(org=self.org))
+        return None
@@ -0,0 +1,61 @@
+from functools import reduce
+from operator import add
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# The weights as of this migration; later changes rebuild their own vectors.
+WEIGHTS = (
+    ("title", "A"),
+)
+
+# Rows updated per statement; each batch commits on its own.
+BATCH_SIZE = 1000
+
+
+def backfill_search_vectors(apps, schema_editor):
+    config = getattr(settings, "SEARCH_CONFIG", "simple")
+    vector = reduce(
+        add,
+        [SearchVector(field, weight=weight, config=config) for field, weight in WEIGHTS],
+    )
+    model = apps.get_model("tasks", "Task")
+    last_pk = None
+    while True:
+        queryset = model.objects.order_by("pk")
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        pks = list(queryset.values_list("pk", flat=True)[:BATCH_SIZE])
+        if not pks:
+            return
+        model.objects.filter(pk__in=pks).update(search_vector=vector)
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+
+    # The backfill commits batch by batch instead of rewriting the whole
+    # table in one transaction, and CREATE INDEX CONCURRENTLY cannot run
+    # inside one either.
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0002_alter_task_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_search_vector'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 import arrow
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from accounts.models import Account
 from common.base import BaseModel
+from common.indexes import trigram_index
 from common.models import Org, Profile
 from contacts.models import Contact
 from teams.models import Teams
@@ -46,12 +49,21 @@ class Task(BaseModel):
     org = models.ForeignKey(
         Org, on_delete=models.SET_NULL, null=True, blank=True, related_name="task_org"
     )
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "Task"
         verbose_name_plural = "Tasks"
         db_table = "task"
         ordering = ("-due_date",)
+        indexes = [
+            GinIndex(fields=["search_vector"], name="task_search_vector"),
+            trigram_index("title", "task_title_trgm"),
+            models.Index(
+                fields=["org", "status", "created_at", "id"],
+                name="task_org_status_created",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}"
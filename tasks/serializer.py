@@ -4,7 +4,8 @@ from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
     ProfileSerializer,
-    UserSerializer
+    UserSerializer,
+    ValuesSummarySerializer,
 )
 from contacts.serializer import ContactSerializer
 from tasks.models import Task
@@ -38,6 +39,25 @@ class TaskSerializer(serializers.ModelSerializer):
         )
 
 
+class TaskSummarySerializer(ValuesSummarySerializer):
+    model = Task
+    fields = (
+        "title",
+        "status",
+        "priority",
+        "due_date",
+        "account",
+        "created_by",
+        "created_at",
+    )
+    default_fields = ("title", "status", "priority", "due_date", "created_at")
+    expandable_fields = {
+        "contacts": ContactSerializer,
+        "teams": TeamsSerializer,
+        "assigned_to": ProfileSerializer,
+    }
+
+
 class TaskCreateSerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
         request_obj = kwargs.pop("request_obj", None)
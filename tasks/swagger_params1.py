@@ -14,4 +14,17 @@ task_list_get_params = [
     OpenApiParameter("title", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("status", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("priority", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT,OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL,OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("expand", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("include_choices", OpenApiTypes.BOOL,OpenApiParameter.QUERY),
+]
+
+export_params = [
+    organization_params_in_header,
+    OpenApiParameter(
+        "output", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["csv", "ndjson"]
+    ),
 ]
@@ -3,14 +3,19 @@ import json
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import Account
 from accounts.serializer import AccountSerializer
+from common.choices import wants_choices
+from common.conditional import conditional_get
+from common.export import TASK_EXPORT, export_output, stream_export
+from common.m2m import sync_m2m
 from common.models import Attachments, Comment, Profile
+from common.pagination import KeysetPagination
+from common.response_cache import cache_response
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import (
@@ -18,6 +23,7 @@ from common.serializer import (
     CommentSerializer,
     ProfileSerializer,
 )
+from common.visibility import filter_visible
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
 from tasks import swagger_params1
@@ -28,14 +34,14 @@ from teams.models import Teams
 from teams.serializer import TeamsSerializer
 
 
-class TaskListView(APIView, LimitOffsetPagination):
+class TaskListView(APIView, KeysetPagination):
     model = Task
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         accounts = Account.objects.filter(org=self.request.profile.org)
         contacts = Contact.objects.filter(org=self.request.profile.org)
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
@@ -43,12 +49,8 @@ class TaskListView(APIView, LimitOffsetPagination):
                 Q(assigned_to__in=[self.request.profile])
                 | Q(created_by=self.request.profile.user)
             )
-            accounts = accounts.filter(
-                Q(created_by=self.request.profile.user) | Q(assigned_to=self.request.profile)
-            ).distinct()
-            contacts = contacts.filter(
-                Q(created_by=self.request.profile.user) | Q(assigned_to=self.request.profile)
-            ).distinct()
+            accounts = filter_visible(accounts, self.request.profile)
+            contacts = filter_visible(contacts, self.request.profile)
 
         if params:
             if params.get("title"):
@@ -58,25 +60,27 @@ class TaskListView(APIView, LimitOffsetPagination):
             if params.get("priority"):
                 queryset = queryset.filter(priority=params.get("priority"))
         context = {}
+        summary = TaskSummarySerializer.from_request(self.request)
+        if summary:
+            queryset = summary.get_queryset(queryset)
         results_tasks = self.paginate_queryset(
             queryset.distinct(), self.request, view=self
         )
-        tasks = TaskSerializer(results_tasks, many=True).data
-        if results_tasks:
-            offset = queryset.filter(id__gte=results_tasks[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        if summary:
+            tasks = summary.to_representation(results_tasks)
         else:
-            offset = 0
+            tasks = TaskSerializer(results_tasks, many=True).data
         context.update(
             {
                 "tasks_count": self.count,
-                "offset": offset,
+                "next": self.next_cursor,
+                "previous": self.previous_cursor,
             }
         )
         context["tasks"] = tasks
-        context["status"] = STATUS_CHOICES
-        context["priority"] = PRIORITY_CHOICES
+        if wants_choices(self.request):
+            context["status"] = STATUS_CHOICES
+            context["priority"] = PRIORITY_CHOICES
         context["accounts_list"] = AccountSerializer(accounts, many=True).data
         context["contacts_list"] = ContactSerializer(contacts, many=True).data
         return context
@@ -84,6 +88,19 @@ class TaskListView(APIView, LimitOffsetPagination):
     @extend_schema(
         tags=["Tasks"], parameters=swagger_params1.task_list_get_params
     )
+    @conditional_get
+    @cache_response(
+        "tasks.Task",
+        "accounts.Account",
+        "accounts.Tags",
+        "contacts.Contact",
+        "teams.Teams",
+        "common.Profile",
+        "common.Address",
+        "common.Attachments",
+        "common.Comment",
+        "common.Org",
+    )
     def get(self, request, *args, **kwargs):
         context = self.get_context_data(**kwargs)
         return Response(context)
@@ -212,6 +229,18 @@ class TaskDetailView(APIView):
     @extend_schema(
         tags=["Tasks"], parameters=swagger_params1.organization_params
     )
+    @conditional_get
+    @cache_response(
+        "tasks.Task",
+        "accounts.Account",
+        "contacts.Contact",
+        "teams.Teams",
+        "common.Profile",
+        "common.Address",
+        "common.Attachments",
+        "common.Comment",
+        "common.Org",
+    )
     def get(self, request, pk, **kwargs):
         self.task_obj = self.get_object(pk)
         context = self.get_context_data(**kwargs)
@@ -278,28 +307,29 @@ class TaskDetailView(APIView):
         )
         if serializer.is_valid():
             task_obj = serializer.save()
-            previous_assigned_to_users = list(
-                task_obj.assigned_to.all().values_list("id", flat=True)
-            )
-            task_obj.contacts.clear()
+            contact_ids = []
             if params.get("contacts"):
                 contacts_list = params.get("contacts")
-                contacts = Contact.objects.filter(id__in=contacts_list, org=request.profile.org)
-                task_obj.contacts.add(*contacts)
+                contact_ids = Contact.objects.filter(
+                    id__in=contacts_list, org=request.profile.org
+                ).values_list("id", flat=True)
+            sync_m2m(task_obj, "contacts", contact_ids)
 
-            task_obj.teams.clear()
+            team_ids = []
             if params.get("teams"):
                 teams_list = params.get("teams")
-                teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                task_obj.teams.add(*teams)
+                team_ids = Teams.objects.filter(
+                    id__in=teams_list, org=request.profile.org
+                ).values_list("id", flat=True)
+            sync_m2m(task_obj, "teams", team_ids)
 
-            task_obj.assigned_to.clear()
+            profile_ids = []
             if params.get("assigned_to"):
                 assinged_to_list = params.get("assigned_to")
-                profiles = Profile.objects.filter(
+                profile_ids = Profile.objects.filter(
                     id__in=assinged_to_list, org=request.profile.org, is_active=True
-                )
-                task_obj.assigned_to.add(*profiles)
+                ).values_list("id", flat=True)
+            sync_m2m(task_obj, "assigned_to", profile_ids)
 
             return Response(
                 {"error": False, "message": "Task updated Successfully"},
@@ -422,3 +452,24 @@ class TaskAttachmentView(APIView):
             },
             status=status.HTTP_403_FORBIDDEN,
         )
+
+
+class TasksExportView(APIView):
+    """Stream every task the caller may see as CSV or NDJSON."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Tasks"], parameters=swagger_params1.export_params)
+    def get(self, request, format=None):
+        output = export_output(request)
+        if output is None:
+            return Response(
+                {"error": True, "errors": "Unsupported output format"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = Task.objects.filter(org=request.profile.org)
+        if request.profile.role != "ADMIN" and not request.profile.is_admin:
+            queryset = queryset.filter(
+                Q(assigned_to__in=[request.profile]) | Q(created_by=request.profile.user)
+            ).distinct()
+        return stream_export(TASK_EXPORT, queryset, output)
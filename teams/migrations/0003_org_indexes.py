@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('teams', '0002_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='teams',
+            index=models.Index(fields=['org', 'created_at', 'id'], name='teams_org_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='teams',
+            index=models.Index(models.F('org'), django.db.models.functions.text.Upper('name'), name='teams_org_upper_name'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 import arrow
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
+from common.indexes import trigram_index
 from common.models import Org, Profile
 from common.base import BaseModel
 
@@ -19,6 +22,11 @@ class Teams(BaseModel):
         verbose_name_plural = "Teams"
         db_table = "teams"
         ordering = ("-created_at",)
+        indexes = [
+            trigram_index("name", "teams_name_trgm"),
+            models.Index(fields=["org", "created_at", "id"], name="teams_org_created"),
+            models.Index(F("org"), Upper("name"), name="teams_org_upper_name"),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -1,15 +1,25 @@
 from rest_framework import serializers
 
-from common.serializer import ProfileSerializer,UserSerializer
+from common.serializer import (
+    EagerLoadingListSerializer,
+    EagerLoadingMixin,
+    ProfileSerializer,
+    UserSerializer,
+    ValuesSummarySerializer,
+)
 from teams.models import Teams
 
 
-class TeamsSerializer(serializers.ModelSerializer):
+class TeamsSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     users = ProfileSerializer(read_only=True, many=True)
     created_by = UserSerializer()
 
+    select_related_fields = ("created_by",)
+    nested_serializers = {"users": ProfileSerializer}
+
     class Meta:
         model = Teams
+        list_serializer_class = EagerLoadingListSerializer
         fields = (
             "id",
             "name",
@@ -21,6 +31,13 @@ class TeamsSerializer(serializers.ModelSerializer):
         )
 
 
+class TeamSummarySerializer(ValuesSummarySerializer):
+    model = Teams
+    fields = ("name", "description", "created_by", "created_at")
+    default_fields = ("name", "description", "created_at")
+    expandable_fields = {"users": ProfileSerializer}
+
+
 class TeamCreateSerializer(serializers.ModelSerializer):
     
     def __init__(self, *args, **kwargs):
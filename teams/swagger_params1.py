@@ -14,4 +14,9 @@ teams_list_get_params = [
     OpenApiParameter("team_name", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("created_by", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("assigned_users", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("cursor", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("limit", OpenApiTypes.INT,OpenApiParameter.QUERY),
+    OpenApiParameter("with_count", OpenApiTypes.BOOL,OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter("expand", OpenApiTypes.STR,OpenApiParameter.QUERY),
 ]
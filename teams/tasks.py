@@ -1,146 +1,87 @@
+import logging
+import uuid
+
 from celery import Celery
 
+from common.m2m import add_m2m_links, m2m_through, remove_m2m_links
 from common.models import Profile
 from teams.models import Teams
 
 app = Celery("redis://")
 
+logger = logging.getLogger(__name__)
 
-@app.task
-def remove_users(removed_users_list, team_id):
-    removed_users_list = [i for i in removed_users_list if i.isdigit()]
-    users_list = Profile.objects.filter(id__in=removed_users_list)
-    if users_list.exists():
-        team = Teams.objects.filter(id=team_id).first()
-        if team:
-            accounts = team.account_teams.all()
-            for account in accounts:
-                for user in users_list:
-                    account.assigned_to.remove(user)
+# Reverse accessor of each model's ``teams`` M2M, mapped to the M2M on that
+# model which team members get copied into.
+TEAM_MEMBER_FIELDS = {
+    "account_teams": "assigned_to",
+    "contact_teams": "assigned_to",
+    "lead_teams": "assigned_to",
+    "oppurtunity_teams": "assigned_to",
+    "cases_teams": "assigned_to",
+    "document_teams": "shared_to",
+    "tasks_teams": "assigned_to",
+    "invoices_teams": "assigned_to",
+    "event_teams": "assigned_to",
+}
 
-            # for contacts
-            contacts = team.contact_teams.all()
-            for contact in contacts:
-                for user in users_list:
-                    contact.assigned_to.remove(user)
 
-            # for leads
-            leads = team.lead_teams.all()
-            for lead in leads:
-                for user in users_list:
-                    lead.assigned_to.remove(user)
+def team_relations():
+    """Yield (model, teams field, member field) for every installed model linked to teams."""
+    for rel in Teams._meta.related_objects:
+        if rel.many_to_many and rel.related_name in TEAM_MEMBER_FIELDS:
+            yield rel.related_model, rel.field.name, TEAM_MEMBER_FIELDS[rel.related_name]
 
-            # for opportunities
-            opportunities = team.oppurtunity_teams.all()
-            for opportunity in opportunities:
-                for user in users_list:
-                    opportunity.assigned_to.remove(user)
 
-            # for cases
-            cases = team.cases_teams.all()
-            for case in cases:
-                for user in users_list:
-                    case.assigned_to.remove(user)
+def valid_uuids(values):
+    ids = []
+    for value in values:
+        try:
+            ids.append(uuid.UUID(str(value)))
+        except ValueError:
+            continue
+    return ids
 
-            # for documents
-            docs = team.document_teams.all()
-            for doc in docs:
-                for user in users_list:
-                    doc.shared_to.remove(user)
 
-            # for tasks
-            tasks = team.tasks_teams.all()
-            for task in tasks:
-                for user in users_list:
-                    task.assigned_to.remove(user)
+def team_object_ids(model, teams_field, team_id):
+    """Ids of the ``model`` rows linked to ``team_id``, read from the through table."""
+    through, source, target = m2m_through(model, teams_field)
+    return through.objects.filter(**{target: team_id}).values_list(source, flat=True)
 
-            # for invoices
-            invoices = team.invoices_teams.all()
-            for invoice in invoices:
-                for user in users_list:
-                    invoice.assigned_to.remove(user)
 
-            # for events
-            events = team.event_teams.all()
-            for event in events:
-                for user in users_list:
-                    event.assigned_to.remove(user)
+@app.task
+def remove_users(removed_users_list, team_id):
+    """this function removes the given profiles from assigned_to on all models of a team"""
+    removed_ids = list(
+        Profile.objects.filter(id__in=valid_uuids(removed_users_list)).values_list(
+            "id", flat=True
+        )
+    )
+    team = Teams.objects.filter(id=team_id).first()
+    if not removed_ids or not team:
+        return {}
+    rows_removed = {}
+    for model, teams_field, member_field in team_relations():
+        object_ids = team_object_ids(model, teams_field, team.id).iterator()
+        rows_removed[model._meta.label] = remove_m2m_links(
+            model, member_field, object_ids, removed_ids
+        )
+    logger.info("remove_users(%s): rows removed %s", team_id, rows_removed)
+    return rows_removed
 
 
 @app.task
 def update_team_users(team_id):
     """this function updates assigned_to field on all models when a team is updated"""
     team = Teams.objects.filter(id=team_id).first()
-    if team:
-        teams_members = team.users.all()
-        # for accounts
-        accounts = team.account_teams.all()
-        for account in accounts:
-            account_assigned_to_users = account.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in account_assigned_to_users:
-                    account.assigned_to.add(team_member)
-
-        # for contacts
-        contacts = team.contact_teams.all()
-        for contact in contacts:
-            contact_assigned_to_users = contact.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in contact_assigned_to_users:
-                    contact.assigned_to.add(team_member)
-
-        # for leads
-        leads = team.lead_teams.all()
-        for lead in leads:
-            lead_assigned_to_users = lead.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in lead_assigned_to_users:
-                    lead.assigned_to.add(team_member)
-
-        # for opportunities
-        opportunities = team.oppurtunity_teams.all()
-        for opportunity in opportunities:
-            opportunity_assigned_to_users = opportunity.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in opportunity_assigned_to_users:
-                    opportunity.assigned_to.add(team_member)
-
-        # for cases
-        cases = team.cases_teams.all()
-        for case in cases:
-            case_assigned_to_users = case.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in case_assigned_to_users:
-                    case.assigned_to.add(team_member)
-
-        # for documents
-        docs = team.document_teams.all()
-        for doc in docs:
-            doc_assigned_to_users = doc.shared_to.all()
-            for team_member in teams_members:
-                if team_member not in doc_assigned_to_users:
-                    doc.shared_to.add(team_member)
-
-        # for tasks
-        tasks = team.tasks_teams.all()
-        for task in tasks:
-            task_assigned_to_users = task.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in task_assigned_to_users:
-                    task.assigned_to.add(team_member)
-
-        # for invoices
-        invoices = team.invoices_teams.all()
-        for invoice in invoices:
-            invoice_assigned_to_users = invoice.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in invoice_assigned_to_users:
-                    invoice.assigned_to.add(team_member)
-
-        # for events
-        events = team.event_teams.all()
-        for event in events:
-            event_assigned_to_users = event.assigned_to.all()
-            for team_member in teams_members:
-                if team_member not in event_assigned_to_users:
-                    event.assigned_to.add(team_member)
+    if not team:
+        return {}
+    member_ids = list(team.users.values_list("id", flat=True))
+    rows_added = {}
+    for model, teams_field, member_field in team_relations():
+        object_ids = team_object_ids(model, teams_field, team.id).iterator()
+        rows_added[model._meta.label] = add_m2m_links(
+            model, member_field, object_ids, member_ids
+        )
+    logger.info("update_team_users(%s): rows added %s", team_id, rows_added)
+    return rows_added
@@ -3,26 +3,33 @@ from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schem
 
 #from common.external_auth import CustomDualAuthentication
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.conditional import conditional_get
 from common.models import Profile
+from common.pagination import KeysetPagination
+from common.response_cache import cache_response
 from teams import swagger_params1
 from teams.models import Teams
-from teams.serializer import TeamCreateSerializer, TeamsSerializer,TeamswaggerCreateSerializer
+from teams.serializer import (
+    TeamCreateSerializer,
+    TeamsSerializer,
+    TeamSummarySerializer,
+    TeamswaggerCreateSerializer,
+)
 from teams.tasks import remove_users, update_team_users
 
 
-class TeamsListView(APIView, LimitOffsetPagination):
+class TeamsListView(APIView, KeysetPagination):
     model = Teams
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = self.model.objects.filter(org=self.request.profile.org)
         if params:
             if params.get("team_name"):
                 queryset = queryset.filter(name__icontains=params.get("team_name"))
@@ -34,26 +41,32 @@ class TeamsListView(APIView, LimitOffsetPagination):
                 )
 
         context = {}
+        summary = TeamSummarySerializer.from_request(self.request)
+        if summary:
+            queryset = summary.get_queryset(queryset)
         results_teams = self.paginate_queryset(
             queryset.distinct(), self.request, view=self
         )
-        teams = TeamsSerializer(results_teams, many=True).data
-        if results_teams:
-            offset = queryset.filter(id__gte=results_teams[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        if summary:
+            teams = summary.to_representation(results_teams)
         else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context.update({"teams_count": self.count, "offset": offset})
+            teams = TeamsSerializer(results_teams, many=True).data
+        context["per_page"] = self.limit
+        context.update(
+            {
+                "teams_count": self.count,
+                "next": self.next_cursor,
+                "previous": self.previous_cursor,
+            }
+        )
         context["teams"] = teams
         return context
 
     @extend_schema(
         tags=["Teams"], parameters=swagger_params1.teams_list_get_params
     )
+    @conditional_get
+    @cache_response("teams.Teams", "common.Profile")
     def get(self, *args, **kwargs):
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             return Response(
@@ -112,6 +125,7 @@ class TeamsDetailView(APIView):
     @extend_schema(
         tags=["Teams"], parameters=swagger_params1.organization_params
     )
+    @cache_response("teams.Teams", "common.Profile")
     def get(self, request, pk, **kwargs):
         if self.request.profile.role != "ADMIN" and not self.request.profile.is_admin:
             return Response(
@@ -140,8 +154,7 @@ class TeamsDetailView(APIView):
             )
         params = request.data
         self.team = self.get_object(pk)
-        actual_users = self.team.get_users()
-        removed_users = []
+        actual_users = set(self.team.users.values_list("id", flat=True))
         serializer = TeamCreateSerializer(
             data=params, instance=self.team, request_obj=request
         )
@@ -157,11 +170,10 @@ class TeamsDetailView(APIView):
                 if profiles:
                     team_obj.users.add(*profiles)
             update_team_users.delay(pk)
-            latest_users = team_obj.get_users()
-            for user in actual_users:
-                if user not in latest_users:
-                    removed_users.append(user)
-            remove_users.delay(removed_users, pk)
+            latest_users = set(team_obj.users.values_list("id", flat=True))
+            removed_users = [str(user) for user in actual_users - latest_users]
+            if removed_users:
+                remove_users.delay(removed_users, pk)
             return Response(
                 {"error": False, "message": "Team Updated Successfully"},
                 status=status.HTTP_200_OK,